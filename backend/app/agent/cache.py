@@ -0,0 +1,75 @@
+"""
+Response cache for LLM calls.
+
+Wraps a chat model so identical prompts are answered from memory. Only
+deterministic (temperature 0) models are cached - with sampling enabled a
+repeated prompt is expected to produce a different answer.
+"""
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Sequence
+
+from langchain_core.messages import BaseMessage
+
+
+class CachingLLM:
+    """
+    LRU + TTL cache in front of a chat model's ``ainvoke``.
+
+    Keys are a SHA-256 of the message types and contents plus any call
+    kwargs, so the system prompt, the dynamic user message and per-call
+    options all take part in the lookup.
+    """
+
+    def __init__(self, llm: Any, maxsize: int = 256, ttl: float = 3600.0):
+        self.llm = llm
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._cache: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    @property
+    def cacheable(self) -> bool:
+        """Whether the wrapped model is deterministic enough to cache."""
+        return getattr(self.llm, "temperature", None) == 0
+
+    @staticmethod
+    def _key(messages: Sequence[BaseMessage], kwargs: dict) -> str:
+        payload = json.dumps(
+            [[[m.type, m.content] for m in messages], kwargs],
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    async def ainvoke(self, messages: Sequence[BaseMessage], **kwargs) -> Any:
+        """Return a cached response when available, otherwise call the model."""
+        if not self.cacheable:
+            return await self.llm.ainvoke(messages, **kwargs)
+
+        key = self._key(messages, kwargs)
+        now = time.monotonic()
+
+        entry = self._cache.get(key)
+        if entry is not None:
+            stored_at, response = entry
+            if now - stored_at < self.ttl:
+                self._cache.move_to_end(key)
+                return response
+            del self._cache[key]
+
+        response = await self.llm.ainvoke(messages, **kwargs)
+        self._cache[key] = (now, response)
+        if len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+        return response
+
+    def evict(self, messages: Sequence[BaseMessage], **kwargs) -> None:
+        """Forget the cached response for a call, e.g. one that failed to parse."""
+        self._cache.pop(self._key(messages, kwargs), None)
+
+    def __getattr__(self, name: str) -> Any:
+        # Everything else (astream, model_name, ...) goes to the wrapped model
+        return getattr(self.llm, name)
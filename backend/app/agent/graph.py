@@ -2,10 +2,9 @@
 LangGraph Definition for the TODO Executor Agent.
 
 This module defines the state machine that orchestrates:
-1. Goal analysis
-2. Task planning (with Tree of Thoughts)
-3. Task execution loop
-4. Reflection and completion
+1. Goal analysis and task planning (a single LLM call)
+2. Task execution loop
+3. Reflection and completion
 
 Key Features:
 - Checkpointing for persistence/resume
@@ -13,13 +12,53 @@ Key Features:
 - Streaming events via callbacks
 """
 
-from typing import Literal, Callable, Any
+import asyncio
+import functools
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Literal, Callable, Any, AsyncIterator
+import httpx
+from langchain_core.messages import HumanMessage
 from langgraph.graph import StateGraph, START, END
 from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
 from langchain_openai import ChatOpenAI
 
 from .state import AgentState, ExecutionPhase, TaskStatus
 from .nodes import AgentNodes
+from .cache import CachingLLM
+
+logger = logging.getLogger(__name__)
+
+# Seconds between background passive WAL checkpoints
+WAL_CHECKPOINT_INTERVAL = 30
+
+# Number of session states kept by get_state's LRU cache
+STATE_CACHE_SIZE = 128
+
+# Maximum number of sessions returned by list_sessions
+SESSION_LIST_LIMIT = 50
+
+_LATEST_CHECKPOINTS_SQL = """
+    SELECT c.thread_id, c.type, c.checkpoint
+    FROM checkpoints c
+    JOIN (
+        SELECT thread_id, MAX(checkpoint_id) AS checkpoint_id
+        FROM checkpoints
+        WHERE checkpoint_ns = ''
+        GROUP BY thread_id
+        ORDER BY 2 DESC
+        LIMIT ?
+    ) latest
+    ON c.thread_id = latest.thread_id
+    AND c.checkpoint_id = latest.checkpoint_id
+    AND c.checkpoint_ns = ''
+    ORDER BY c.checkpoint_id DESC
+"""
+
+# Status values compared in task-list scans
+_PENDING = TaskStatus.PENDING.value
+_COMPLETED = TaskStatus.COMPLETED.value
 
 
 def should_continue(state: AgentState) -> Literal["select_task", "complete"]:
@@ -27,12 +66,14 @@ def should_continue(state: AgentState) -> Literal["select_task", "complete"]:
     Router: Decide whether to continue executing or complete.
     Called after reflection to check if more tasks remain.
     """
-    tasks = state.get("tasks", [])
+    pending_count = state.get("pending_count")
 
-    # Check if any tasks are still pending
-    pending_tasks = [t for t in tasks if t["status"] == TaskStatus.PENDING.value]
+    # Sessions checkpointed before the counter existed fall back to a scan
+    if pending_count is None:
+        tasks = state.get("tasks", [])
+        pending_count = any(t["status"] == _PENDING for t in tasks)
 
-    if pending_tasks:
+    if pending_count:
         return "select_task"
     else:
         return "complete"
@@ -56,10 +97,7 @@ class TodoExecutorGraph:
     START
       │
       ▼
-    analyze_goal
-      │
-      ▼
-    plan_todos
+    analyze_and_plan
       │
       ▼
     select_task ◄────────────┐
@@ -76,19 +114,92 @@ class TodoExecutorGraph:
       ▼
      END
     ```
+
+    With ``parallel_execution`` the loop is replaced by a single fan-out:
+    select_task → execute_all_tasks → complete. ``batched_execution`` does the
+    same with one LLM call for all tasks (execute_all_tasks_batched).
     """
 
+    # Scalar fields of a fresh run's input state
+    _INITIAL_STATE_TEMPLATE = {
+        "current_task_index": -1,
+        "pending_count": 0,
+        "completed_count": 0,
+        "failed_count": 0,
+        "phase": ExecutionPhase.IDLE.value,
+        "is_paused": False,
+        "error": None,
+    }
+
     def __init__(
         self,
         llm: ChatOpenAI,
         checkpointer: AsyncSqliteSaver = None,
-        on_event: Callable[[str, Any], None] = None
+        on_event: Callable[[str, Any], None] = None,
+        planning_llm: ChatOpenAI = None,
+        parallel_execution: bool = False,
+        max_concurrency: int = 4,
+        verbose_reflection: bool = False,
+        batched_execution: bool = False,
+        http_client: httpx.AsyncClient = None
     ):
         self.llm = llm
         self.checkpointer = checkpointer
-        self.on_event = on_event or (lambda *args: None)
-        self.nodes = AgentNodes(llm)
+        # Shared connection pool of the LLM clients, closed by aclose()
+        self.http_client = http_client
+        self._noop_event = lambda *args: None
+        self.on_event = on_event or self._noop_event
+
+        self.parallel_execution = parallel_execution
+        self.batched_execution = batched_execution
+        self.nodes = AgentNodes(
+            llm,
+            planning_llm=planning_llm,
+            max_concurrency=max_concurrency,
+            verbose_reflection=verbose_reflection
+        )
         self.graph = self._build_graph()
+        self._compiled = None
+        self._state_cache: OrderedDict[str, tuple[str, dict]] = OrderedDict()
+
+        # Started by start_maintenance() once an event loop is running
+        self._wal_task = None
+
+    def start_maintenance(self):
+        """Start the periodic WAL checkpoint task; must be called from a running loop."""
+        if self.checkpointer and (self._wal_task is None or self._wal_task.done()):
+            self._wal_task = asyncio.create_task(self._wal_checkpoint_loop())
+
+    async def _wal_checkpoint_loop(self):
+        """Periodically run a PASSIVE WAL checkpoint on the checkpoints DB."""
+        while True:
+            await asyncio.sleep(WAL_CHECKPOINT_INTERVAL)
+            try:
+                async with self.checkpointer.conn.execute(
+                    "PRAGMA wal_checkpoint(PASSIVE)"
+                ) as cursor:
+                    row = await cursor.fetchone()
+                if row and row[0]:
+                    busy, log_frames, checkpointed = row
+                    logger.info(
+                        f"WAL checkpoint busy: {checkpointed}/{log_frames} frames checkpointed"
+                    )
+            except Exception as e:
+                logger.warning(f"WAL checkpoint failed: {e}")
+
+    async def aclose(self):
+        """Stop background maintenance and close the checkpoint and HTTP connections."""
+        if self._wal_task:
+            self._wal_task.cancel()
+            try:
+                await self._wal_task
+            except asyncio.CancelledError:
+                pass
+            self._wal_task = None
+        if self.checkpointer:
+            await self.checkpointer.conn.close()
+        if self.http_client:
+            await self.http_client.aclose()
 
     def _build_graph(self) -> StateGraph:
         """Construct the LangGraph state machine."""
@@ -97,17 +208,31 @@ class TodoExecutorGraph:
         workflow = StateGraph(AgentState)
 
         # Add nodes
-        workflow.add_node("analyze_goal", self._wrap_node(self.nodes.analyze_goal))
-        workflow.add_node("plan_todos", self._wrap_node(self.nodes.plan_todos))
+        workflow.add_node("analyze_and_plan", self._wrap_node(self.nodes.analyze_and_plan))
         workflow.add_node("select_task", self._wrap_node(self.nodes.select_task))
-        workflow.add_node("execute_task", self._wrap_node(self.nodes.execute_task))
-        workflow.add_node("reflect", self._wrap_node(self.nodes.reflect))
         workflow.add_node("complete", self._wrap_node(self.nodes.complete))
 
         # Define edges
-        workflow.add_edge(START, "analyze_goal")
-        workflow.add_edge("analyze_goal", "plan_todos")
-        workflow.add_edge("plan_todos", "select_task")
+        workflow.add_edge(START, "analyze_and_plan")
+        workflow.add_edge("analyze_and_plan", "select_task")
+
+        # Independent tasks: run them all at once, then finish
+        if self.batched_execution or self.parallel_execution:
+            node_name = (
+                "execute_all_tasks_batched" if self.batched_execution
+                else "execute_all_tasks"
+            )
+            workflow.add_node(
+                node_name,
+                self._wrap_node(getattr(self.nodes, node_name))
+            )
+            workflow.add_edge("select_task", node_name)
+            workflow.add_edge(node_name, "complete")
+            workflow.add_edge("complete", END)
+            return workflow
+
+        workflow.add_node("execute_task", self._wrap_node(self.nodes.execute_task))
+        workflow.add_node("reflect", self._wrap_node(self.nodes.reflect))
 
         # Conditional: check if paused before executing
         workflow.add_edge("select_task", "execute_task")
@@ -132,9 +257,15 @@ class TodoExecutorGraph:
         Wrap a node function to emit events for real-time streaming.
         This enables the AG-UI protocol pattern.
         """
+        # Nothing is listening - run the node directly
+        if self.on_event is self._noop_event:
+            return node_fn
+
+        node_name = node_fn.__name__
+
+        @functools.wraps(node_fn)
         async def wrapped(state: AgentState) -> dict:
             # Emit node start event
-            node_name = node_fn.__name__
             self.on_event("node_start", {"node": node_name})
 
             # Execute the node
@@ -148,59 +279,69 @@ class TodoExecutorGraph:
 
             return result
 
-        # Preserve function name for debugging
-        wrapped.__name__ = node_fn.__name__
         return wrapped
 
     def compile(self):
-        """Compile the graph with optional checkpointing."""
-        if self.checkpointer:
-            return self.graph.compile(checkpointer=self.checkpointer)
-        return self.graph.compile()
+        """
+        Compile the graph with optional checkpointing.
 
-    async def run(
+        The graph and checkpointer never change after construction, so the
+        compiled runtime is built once and reused by every caller.
+        """
+        if self._compiled is None:
+            if self.checkpointer:
+                self._compiled = self.graph.compile(checkpointer=self.checkpointer)
+            else:
+                self._compiled = self.graph.compile()
+        return self._compiled
+
+    def run(
         self,
         session_id: str,
         goal: str,
         stream: bool = True
-    ):
+    ) -> AsyncIterator[dict]:
         """
         Execute the agent for a given goal.
 
+        Returns LangGraph's update stream directly rather than re-yielding it
+        from a wrapper generator, so consumers still use ``async for`` without
+        paying an extra suspend/resume per event.
+
         Args:
             session_id: Unique session identifier for checkpointing
             goal: The user's high-level goal
             stream: Whether to stream intermediate states
 
-        Yields:
-            State updates as the agent progresses
+        Returns:
+            Async iterator of state updates as the agent progresses
         """
         compiled = self.compile()
 
+        # Lists are created per run so no two sessions ever share a container
         initial_state = {
+            **self._INITIAL_STATE_TEMPLATE,
             "session_id": session_id,
             "goal": goal,
             "messages": [],
             "tasks": [],
-            "current_task_index": -1,
-            "phase": ExecutionPhase.IDLE.value,
             "traces": [],
-            "is_paused": False,
-            "error": None
         }
 
         config = {"configurable": {"thread_id": session_id}}
 
         if stream:
-            async for event in compiled.astream(
+            return compiled.astream(
                 initial_state,
                 config,
                 stream_mode="updates"
-            ):
-                yield event
-        else:
-            result = await compiled.ainvoke(initial_state, config)
-            yield result
+            )
+        return self._invoke_once(compiled, initial_state, config)
+
+    @staticmethod
+    async def _invoke_once(compiled, initial_state: dict, config: dict):
+        """Run the graph to completion and yield the final state once."""
+        yield await compiled.ainvoke(initial_state, config)
 
     async def resume(self, session_id: str, user_input: str = None):
         """
@@ -226,11 +367,9 @@ class TodoExecutorGraph:
             # Build update with user input if provided
             update = {"is_paused": False}
             if user_input:
-                # Add user input to messages for context
-                current_messages = state.values.get("messages", [])
-                from langchain_core.messages import HumanMessage
-                new_message = HumanMessage(content=user_input)
-                update["messages"] = current_messages + [new_message]
+                # Add user input to messages for context; the add_messages
+                # reducer appends it, so the history doesn't need copying
+                update["messages"] = [HumanMessage(content=user_input)]
                 update["human_input"] = user_input  # Store for task execution
 
             # Continue execution with updates
@@ -242,11 +381,45 @@ class TodoExecutorGraph:
                 yield event
 
     async def get_state(self, session_id: str) -> AgentState:
-        """Get the current state for a session."""
+        """
+        Get the current state for a session.
+
+        States are cached per session together with the checkpoint id they
+        were read at; a cheap primary-key lookup of the latest checkpoint id
+        decides whether the cached copy is still current.
+
+        The returned dict may be the cached object itself and is shared
+        between callers, so it must be treated as read-only.
+        """
         compiled = self.compile()
         config = {"configurable": {"thread_id": session_id}}
+
+        checkpoint_id = None
+        if self.checkpointer:
+            await self.checkpointer.setup()
+            async with self.checkpointer.conn.execute(
+                "SELECT MAX(checkpoint_id) FROM checkpoints "
+                "WHERE thread_id = ? AND checkpoint_ns = ''",
+                (session_id,)
+            ) as cursor:
+                row = await cursor.fetchone()
+            checkpoint_id = row[0] if row else None
+
+            cached = self._state_cache.get(session_id)
+            if checkpoint_id and cached and cached[0] == checkpoint_id:
+                self._state_cache.move_to_end(session_id)
+                return cached[1]
+
         state = await compiled.aget_state(config)
-        return state.values if state else None
+        values = state.values if state else None
+
+        if checkpoint_id and values:
+            self._state_cache[session_id] = (checkpoint_id, values)
+            self._state_cache.move_to_end(session_id)
+            if len(self._state_cache) > STATE_CACHE_SIZE:
+                self._state_cache.popitem(last=False)
+
+        return values
 
     async def list_sessions(self) -> list[dict]:
         """List all available sessions from the checkpointer."""
@@ -255,33 +428,69 @@ class TodoExecutorGraph:
 
         sessions = []
         try:
-            # Query unique thread_ids from the checkpoints table
+            await self.checkpointer.setup()
+            # Load the latest root checkpoint of each thread in one query instead
+            # of hydrating every session through a separate get_state() call.
+            # The grouping is answered from the (thread_id, checkpoint_ns,
+            # checkpoint_id) primary key, and sessions come back most recently
+            # active first since checkpoint ids are time-ordered.
             async with self.checkpointer.conn.execute(
-                "SELECT DISTINCT thread_id FROM checkpoints ORDER BY thread_id DESC LIMIT 50"
+                _LATEST_CHECKPOINTS_SQL, (SESSION_LIST_LIMIT,)
             ) as cursor:
                 rows = await cursor.fetchall()
-                for row in rows:
-                    session_id = row[0]
-                    state = await self.get_state(session_id)
-                    if state:
-                        sessions.append({
-                            "session_id": session_id,
-                            "goal": state.get("goal", ""),
-                            "phase": state.get("phase", "unknown"),
-                            "task_count": len(state.get("tasks", [])),
-                            "completed_count": len([t for t in state.get("tasks", []) if t.get("status") == "completed"])
-                        })
-        except Exception as e:
-            print(f"Error listing sessions: {e}")
+            for session_id, type_, blob in rows:
+                checkpoint = self.checkpointer.serde.loads_typed((type_, blob))
+                state = checkpoint.get("channel_values", {})
+                if state:
+                    tasks = state.get("tasks", [])
+                    completed = state.get("completed_count", 0)
+                    # Sessions from before the counters existed lack pending_count
+                    if state.get("pending_count") is None:
+                        completed = sum(1 for t in tasks if t.get("status") == _COMPLETED)
+                    sessions.append({
+                        "session_id": session_id,
+                        "goal": state.get("goal", ""),
+                        "phase": state.get("phase", "unknown"),
+                        "task_count": len(tasks),
+                        "completed_count": completed
+                    })
+        except Exception:
+            logger.exception("list_sessions failed")
 
         return sessions
 
 
+def _prepare_db_path(db_path: str) -> None:
+    """Create the checkpoint DB's parent directory and file (blocking I/O)."""
+    path = Path(db_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.touch(exist_ok=True)
+
+
+async def _configure_connection(conn) -> None:
+    """Apply connection-level PRAGMAs for checkpoint workloads."""
+    # WAL lets session listing read checkpoints while a run is writing them,
+    # and synchronous=NORMAL drops the per-commit fsync of the rollback journal
+    await conn.execute("PRAGMA journal_mode=WAL")
+    await conn.execute("PRAGMA synchronous=NORMAL")
+    await conn.execute("PRAGMA temp_store=MEMORY")
+    await conn.execute("PRAGMA cache_size=-65536")  # 64 MB
+    await conn.execute("PRAGMA mmap_size=268435456")  # 256 MB
+    # Truncate the WAL back to 64 MB after checkpoints so it can't grow unbounded
+    await conn.execute("PRAGMA journal_size_limit=67108864")
+
+
 async def create_agent(
     openai_api_key: str,
     model: str = "gpt-4.1-mini",
+    temperature: float = 0.7,
     db_path: str = "checkpoints.db",
-    on_event: Callable = None
+    on_event: Callable = None,
+    llm_cache_size: int = 256,
+    parallel_execution: bool = False,
+    max_concurrency: int = 4,
+    verbose_reflection: bool = False,
+    batched_execution: bool = False
 ) -> TodoExecutorGraph:
     """
     Factory function to create a configured agent.
@@ -289,24 +498,65 @@ async def create_agent(
     Args:
         openai_api_key: OpenAI API key
         model: Model to use (default: gpt-4o-mini for cost efficiency)
+        temperature: Sampling temperature; 0 enables response caching
         db_path: Path for SQLite checkpoint database
         on_event: Callback for real-time event streaming
+        llm_cache_size: Max cached LLM responses (temperature 0 only)
+        parallel_execution: Execute all planned tasks concurrently instead of
+            the sequential select/execute/reflect loop
+        max_concurrency: Max concurrent LLM calls in parallel execution
+        verbose_reflection: Use the LLM to reflect on failed tasks
+        batched_execution: Execute all planned tasks with a single LLM call,
+            falling back to parallel execution if the response can't be used
     """
-    llm = ChatOpenAI(
-        api_key=openai_api_key,
-        model=model,
-        temperature=0.7
+    # One pooled HTTP/2 client serves every model call, so bursts of task
+    # executions reuse warm connections instead of opening new TLS sessions
+    http_client = httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+        timeout=60.0
+    )
+
+    # Every node shares one cache policy: responses are reused only when
+    # temperature is 0, and unparseable ones are evicted by the nodes
+    llm = CachingLLM(
+        ChatOpenAI(
+            api_key=openai_api_key,
+            model=model,
+            temperature=temperature,
+            http_async_client=http_client
+        ),
+        maxsize=llm_cache_size
     )
 
     # For newer langgraph versions, we need to use the async context manager
     # but we'll create a simpler version without persistence for now
     # to avoid the async context manager complexity
     import aiosqlite
-    conn = await aiosqlite.connect(db_path)
+    conn = None
+    try:
+        await asyncio.to_thread(_prepare_db_path, db_path)
+        conn = await aiosqlite.connect(db_path)
+        await _configure_connection(conn)
+    except BaseException:
+        # Don't leak the connection or HTTP pool if startup fails or is cancelled
+        if conn is not None:
+            await conn.close()
+        await http_client.aclose()
+        raise
+
     checkpointer = AsyncSqliteSaver(conn)
 
-    return TodoExecutorGraph(
+    agent = TodoExecutorGraph(
         llm=llm,
         checkpointer=checkpointer,
-        on_event=on_event
+        on_event=on_event,
+        parallel_execution=parallel_execution,
+        max_concurrency=max_concurrency,
+        verbose_reflection=verbose_reflection,
+        batched_execution=batched_execution,
+        http_client=http_client
     )
+    # Keep the WAL file bounded without ever blocking the event loop
+    agent.start_maintenance()
+    return agent
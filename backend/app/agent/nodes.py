@@ -5,25 +5,174 @@ Each node is a pure function that takes state and returns state updates.
 
 import asyncio
 import random
-from datetime import datetime
+import re
+from datetime import datetime, timezone
 from typing import Any
-from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+import orjson
+from langchain_core.messages import AIMessage, SystemMessage
 from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.prompts import ChatPromptTemplate, HumanMessagePromptTemplate
 
-from .state import AgentState, Task, TaskStatus, TraceEntry, ExecutionPhase
+from .cache import CachingLLM
+from .state import AgentState, Task, TaskStatus, ExecutionPhase
 
 
-def create_trace(node: str, action: str, message: str, task_id: str = None, details: dict = None) -> dict:
-    """Helper to create a trace entry."""
-    return TraceEntry(
-        timestamp=datetime.utcnow(),
-        node=node,
-        action=action,
-        task_id=task_id,
-        message=message,
-        details=details
-    ).model_dump()
+# Prompts are built once at import; nodes only fill in the per-call values.
+# System messages are literal (their JSON examples are not template fields).
+
+_PLAN_PROMPT = ChatPromptTemplate.from_messages([
+    SystemMessage(content="""You are an expert task planner. Briefly acknowledge the user's goal, then break it down into 3-6 concrete, actionable tasks.
+
+Output ONLY valid JSON in this exact format:
+{
+  "ack": "1-2 sentence acknowledgement of the goal",
+  "tasks": [
+    {"title": "Task title", "description": "Brief description of what to do"},
+    {"title": "Another task", "description": "Its description"}
+  ],
+  "reasoning": "Brief explanation of why you chose these tasks"
+}
+
+Rules:
+- Each task should be independently executable
+- Tasks should be in logical order
+- Be specific and actionable
+- Keep descriptions under 100 characters"""),
+    HumanMessagePromptTemplate.from_template("Break down this goal into tasks:\n\n{goal}")
+])
+
+_EXECUTE_PROMPT = ChatPromptTemplate.from_messages([
+    SystemMessage(content="""You are an expert task executor. Execute the given task and provide a concrete, actionable output.
+
+Your response should be the ACTUAL DELIVERABLE for this task - not just a description of what to do.
+
+For example:
+- If the task is "Write a headline", output the actual headline text
+- If the task is "Create HTML structure", output the actual HTML code
+- If the task is "Define color scheme", output the actual colors (hex codes)
+- If the task is "Write copy", output the actual text content
+
+Be specific and provide real, usable output. Keep responses concise but complete (under 500 characters).
+Format code blocks with triple backticks if providing code."""),
+    HumanMessagePromptTemplate.from_template("""Goal: {goal}
+
+Task to execute: {title}
+Description: {description}
+
+Please execute this task and provide the actual output/deliverable:""")
+])
+
+_BATCH_EXECUTE_PROMPT = ChatPromptTemplate.from_messages([
+    SystemMessage(content="""You are an expert task executor. Execute every task in the given list and provide a concrete, actionable output for each.
+
+Each result should be the ACTUAL DELIVERABLE for its task - not just a description of what to do.
+
+For example:
+- If the task is "Write a headline", output the actual headline text
+- If the task is "Create HTML structure", output the actual HTML code
+- If the task is "Define color scheme", output the actual colors (hex codes)
+- If the task is "Write copy", output the actual text content
+
+Keep each result concise but complete (under 500 characters).
+
+Output ONLY a valid JSON array with one entry per task, in this exact format:
+[
+  {"id": "id of the task", "result": "The deliverable for that task"}
+]"""),
+    HumanMessagePromptTemplate.from_template("""Goal: {goal}
+
+Tasks to execute:
+{tasks}
+
+Please execute each task and provide the actual outputs/deliverables:""")
+])
+
+_REFLECT_PROMPT = ChatPromptTemplate.from_messages([
+    SystemMessage(content="""You are reflecting on task execution progress.
+Give a brief (1 sentence) status update on the failed task and overall progress.
+Be encouraging but factual."""),
+    HumanMessagePromptTemplate.from_template("""
+Task failed: {title}
+Error: {error}
+
+Overall progress: {completed}/{total} completed, {failed} failed
+""")
+])
+
+
+# Status values, read once instead of per comparison/assignment
+_PENDING = TaskStatus.PENDING.value
+_IN_PROGRESS = TaskStatus.IN_PROGRESS.value
+_COMPLETED = TaskStatus.COMPLETED.value
+_FAILED = TaskStatus.FAILED.value
+
+
+def create_trace(
+    node: str,
+    action: str,
+    message: str,
+    task_id: str = None,
+    details: dict = None,
+    timestamp: datetime = None
+) -> dict:
+    """
+    Helper to create a trace entry.
+
+    Builds the TraceEntry shape directly as a dict; the model itself is only
+    needed for validation at API boundaries. Nodes pass the ``timestamp``
+    they read once per invocation; it defaults to the current UTC time.
+    """
+    if timestamp is None:
+        timestamp = datetime.now(timezone.utc)
+    return {
+        "timestamp": timestamp.isoformat(),
+        "node": node,
+        "action": action,
+        "task_id": task_id,
+        "message": message,
+        "details": details
+    }
+
+
+# Opening fence with optional language tag, body, optional closing fence;
+# the body may sit on the fence lines themselves
+_CODE_FENCE = re.compile(r"```[\w-]*\s*(.*?)\s*(?:```)?", re.DOTALL)
+
+
+def _strip_code_fence(content: str) -> str:
+    """Return the body of a markdown code-fenced LLM response."""
+    content = content.strip()
+    match = _CODE_FENCE.fullmatch(content)
+    return match.group(1) if match else content
+
+
+def _evict_cached(llm: Any, messages: list, **kwargs) -> None:
+    """Drop an unusable response from the model's cache so a retry calls the LLM."""
+    if isinstance(llm, CachingLLM):
+        llm.evict(messages, **kwargs)
+
+
+def _status_deltas(tasks: list[dict]) -> dict:
+    """Counter deltas for a batch of tasks that just finished executing."""
+    completed = sum(1 for t in tasks if t["status"] == _COMPLETED)
+    return {"completed_count": completed, "failed_count": len(tasks) - completed}
+
+
+def _progress_counts(state: AgentState) -> tuple[int, int]:
+    """
+    Return (completed, failed) for the session.
+
+    Reads the running counters; sessions checkpointed before they existed
+    fall back to a scan of the task list. Such sessions are recognised by
+    the missing pending_count: the additive counters always read as 0 in a
+    compiled graph, and only hold deltas since the session was resumed.
+    """
+    if state.get("pending_count") is None:
+        tasks = state["tasks"]
+        completed = sum(1 for t in tasks if t["status"] == _COMPLETED)
+        failed = sum(1 for t in tasks if t["status"] == _FAILED)
+        return completed, failed
+    return state.get("completed_count", 0), state.get("failed_count", 0)
 
 
 class AgentNodes:
@@ -34,105 +183,79 @@ class AgentNodes:
     - Each node is focused on a single responsibility
     - Nodes return only state updates (not full state)
     - All LLM calls are isolated and traceable
+    - System prompts are static and come first; per-request content goes
+      in the trailing HumanMessage so provider prefix caching applies
     """
 
-    def __init__(self, llm: ChatOpenAI):
+    def __init__(
+        self,
+        llm: ChatOpenAI,
+        planning_llm: ChatOpenAI = None,
+        max_concurrency: int = 4,
+        verbose_reflection: bool = False
+    ):
         self.llm = llm
-
-    async def analyze_goal(self, state: AgentState) -> dict:
+        self.max_concurrency = max_concurrency
+        # Reflections are templated; opt in to LLM-written ones for failures
+        self.verbose_reflection = verbose_reflection
+        # Goal analysis and planning are stateless functions of the goal, so
+        # they may use a separately configured (e.g. response-cached) model
+        self.planning_llm = planning_llm or llm
+
+    async def analyze_and_plan(self, state: AgentState) -> dict:
         """
-        Analyze the user's goal and prepare for planning.
-        This node validates the goal and extracts key requirements.
+        Acknowledge the user's goal and generate a structured TODO list.
+
+        Goal analysis and planning share a single LLM call: the response
+        carries both the acknowledgement and the task breakdown, which saves
+        a full round trip before execution can start.
         """
         goal = state["goal"]
+        now = datetime.now(timezone.utc)
 
-        trace = create_trace(
-            node="analyze_goal",
+        trace_analyze = create_trace(
+            node="analyze_and_plan",
             action="analyzing",
-            message=f"Analyzing goal: {goal[:100]}..."
+            message=f"Analyzing goal: {goal[:100]}...",
+            timestamp=now
         )
-
-        # Quick validation - in production, this could do more analysis
-        prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(content="""You are a task planning assistant.
-Briefly acknowledge the user's goal and confirm you'll create a task list.
-Be concise - 1-2 sentences max."""),
-            HumanMessage(content=f"Goal: {goal}")
-        ])
-
-        response = await self.llm.ainvoke(prompt.format_messages())
-
-        return {
-            "phase": ExecutionPhase.ANALYZING.value,
-            "messages": [AIMessage(content=response.content)],
-            "traces": [trace]
-        }
-
-    async def plan_todos(self, state: AgentState) -> dict:
-        """
-        Generate a structured TODO list from the user's goal.
-        Uses Tree of Thoughts approach - generate, then refine.
-        """
-        goal = state["goal"]
-
         trace_start = create_trace(
-            node="plan_todos",
+            node="analyze_and_plan",
             action="planning_started",
-            message="Generating task breakdown..."
+            message="Generating task breakdown...",
+            timestamp=now
         )
 
         # Structured output prompt for reliable JSON
-        prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(content="""You are an expert task planner. Break down the user's goal into 3-6 concrete, actionable tasks.
-
-Output ONLY valid JSON in this exact format:
-{
-  "tasks": [
-    {"title": "Task title", "description": "Brief description of what to do"},
-    {"title": "Another task", "description": "Its description"}
-  ],
-  "reasoning": "Brief explanation of why you chose these tasks"
-}
-
-Rules:
-- Each task should be independently executable
-- Tasks should be in logical order
-- Be specific and actionable
-- Keep descriptions under 100 characters"""),
-            HumanMessage(content=f"Break down this goal into tasks:\n\n{goal}")
-        ])
-
-        response = await self.llm.ainvoke(prompt.format_messages())
+        prompt = _PLAN_PROMPT.format_messages(goal=goal)
+        response = await self.planning_llm.ainvoke(
+            prompt, prompt_cache_key="analyze_and_plan"
+        )
+        now = datetime.now(timezone.utc)
 
         # Parse the response
         try:
-            import json
             # Clean up response - handle markdown code blocks
-            content = response.content.strip()
-            if content.startswith("```"):
-                content = content.split("```")[1]
-                if content.startswith("json"):
-                    content = content[4:]
-            content = content.strip()
-
-            result = json.loads(content)
+            result = orjson.loads(_strip_code_fence(response.content))
+            ack = result.get("ack", "")
             tasks_data = result.get("tasks", [])
             reasoning = result.get("reasoning", "")
 
             # Create Task objects
             tasks = []
             for t in tasks_data:
-                task = Task.create(
-                    title=t["title"],
-                    description=t["description"]
-                )
+                title, description = t["title"], t["description"]
+                if not isinstance(title, str) or not isinstance(description, str):
+                    raise TypeError(f"task title and description must be strings, got {t!r}")
+                task = Task.create(title=title, description=description)
                 tasks.append(task.model_dump())
 
             trace_complete = create_trace(
-                node="plan_todos",
+                node="analyze_and_plan",
                 action="planning_complete",
                 message=f"Created {len(tasks)} tasks. {reasoning}",
-                details={"task_count": len(tasks)}
+                details={"task_count": len(tasks)},
+                timestamp=now
             )
 
             # Create a nice message for the user
@@ -140,23 +263,30 @@ Rules:
                                    for i, t in enumerate(tasks)])
             ai_message = f"I've broken down your goal into {len(tasks)} tasks:\n\n{task_list}\n\nStarting execution..."
 
+            messages = [AIMessage(content=ai_message)]
+            if ack:
+                messages.insert(0, AIMessage(content=ack))
+
             return {
                 "phase": ExecutionPhase.PLANNING.value,
                 "tasks": tasks,
-                "messages": [AIMessage(content=ai_message)],
-                "traces": [trace_start, trace_complete]
+                "pending_count": len(tasks),
+                "messages": messages,
+                "traces": [trace_analyze, trace_start, trace_complete]
             }
 
-        except (json.JSONDecodeError, KeyError) as e:
+        except (orjson.JSONDecodeError, KeyError, TypeError) as e:
+            _evict_cached(self.planning_llm, prompt, prompt_cache_key="analyze_and_plan")
             trace_error = create_trace(
-                node="plan_todos",
+                node="analyze_and_plan",
                 action="planning_error",
-                message=f"Failed to parse task list: {str(e)}"
+                message=f"Failed to parse task list: {str(e)}",
+                timestamp=now
             )
             return {
                 "phase": ExecutionPhase.ERROR.value,
                 "error": f"Failed to generate task list: {str(e)}",
-                "traces": [trace_start, trace_error]
+                "traces": [trace_analyze, trace_start, trace_error]
             }
 
     async def select_task(self, state: AgentState) -> dict:
@@ -165,15 +295,17 @@ Rules:
         Simple policy: first pending task.
         """
         tasks = state["tasks"]
+        now = datetime.now(timezone.utc)
 
         # Find first pending task
         for i, task in enumerate(tasks):
-            if task["status"] == TaskStatus.PENDING.value:
+            if task["status"] == _PENDING:
                 trace = create_trace(
                     node="select_task",
                     action="task_selected",
                     message=f"Selected task: {task['title']}",
-                    task_id=task["id"]
+                    task_id=task["id"],
+                    timestamp=now
                 )
                 return {
                     "current_task_index": i,
@@ -185,7 +317,8 @@ Rules:
         trace = create_trace(
             node="select_task",
             action="all_tasks_complete",
-            message="All tasks have been processed"
+            message="All tasks have been processed",
+            timestamp=now
         )
         return {
             "current_task_index": -1,
@@ -193,92 +326,261 @@ Rules:
             "traces": [trace]
         }
 
-    async def execute_task(self, state: AgentState) -> dict:
+    async def _run_task(
+        self,
+        task: dict,
+        goal: str,
+        node: str = "execute_task",
+        cache_key: str = "execute_task"
+    ) -> tuple[dict, list[dict]]:
         """
-        Execute the current task using LLM to generate real output.
+        Execute a single task with the LLM.
 
-        The agent generates actual content/deliverables for each task
-        based on the task description and overall goal.
+        Returns the updated task dict (the input is not mutated) together
+        with its start/completion traces. ``cache_key`` is forwarded as the
+        provider prompt-cache key so calls sharing the system prompt and
+        goal prefix are routed to the same cache.
         """
-        task_index = state["current_task_index"]
-        tasks = state["tasks"]
-        goal = state.get("goal", "")
-
-        if task_index < 0 or task_index >= len(tasks):
-            return {"error": "Invalid task index"}
-
-        task = tasks[task_index].copy()
+        task = task.copy()
+        now = datetime.now(timezone.utc)
 
         trace_start = create_trace(
-            node="execute_task",
+            node=node,
             action="execution_started",
             message=f"Starting: {task['title']}",
-            task_id=task["id"]
+            task_id=task["id"],
+            timestamp=now
         )
 
         # Update task to in_progress
-        task["status"] = TaskStatus.IN_PROGRESS.value
-        task["started_at"] = datetime.utcnow().isoformat()
+        task["status"] = _IN_PROGRESS
+        task["started_at"] = now.isoformat()
 
         try:
             # Generate real output using LLM
-            prompt = ChatPromptTemplate.from_messages([
-                SystemMessage(content="""You are an expert task executor. Execute the given task and provide a concrete, actionable output.
-
-Your response should be the ACTUAL DELIVERABLE for this task - not just a description of what to do.
-
-For example:
-- If the task is "Write a headline", output the actual headline text
-- If the task is "Create HTML structure", output the actual HTML code
-- If the task is "Define color scheme", output the actual colors (hex codes)
-- If the task is "Write copy", output the actual text content
-
-Be specific and provide real, usable output. Keep responses concise but complete (under 500 characters).
-Format code blocks with triple backticks if providing code."""),
-                HumanMessage(content=f"""Goal: {goal}
-
-Task to execute: {task['title']}
-Description: {task['description']}
-
-Please execute this task and provide the actual output/deliverable:""")
-            ])
-
-            response = await self.llm.ainvoke(prompt.format_messages())
+            response = await self.llm.ainvoke(
+                _EXECUTE_PROMPT.format_messages(
+                    goal=goal,
+                    title=task["title"],
+                    description=task["description"]
+                ),
+                prompt_cache_key=cache_key
+            )
             result_content = response.content.strip()
+            now = datetime.now(timezone.utc)
 
-            task["status"] = TaskStatus.COMPLETED.value
+            task["status"] = _COMPLETED
             task["result"] = result_content
-            task["completed_at"] = datetime.utcnow().isoformat()
+            task["completed_at"] = now.isoformat()
 
             trace_complete = create_trace(
-                node="execute_task",
+                node=node,
                 action="execution_success",
                 message=f"Completed: {task['title']}",
                 task_id=task["id"],
-                details={"output_length": len(result_content)}
+                details={"output_length": len(result_content)},
+                timestamp=now
             )
 
         except Exception as e:
-            task["status"] = TaskStatus.FAILED.value
+            now = datetime.now(timezone.utc)
+            task["status"] = _FAILED
             task["error"] = f"Execution failed: {str(e)}"
-            task["completed_at"] = datetime.utcnow().isoformat()
+            task["completed_at"] = now.isoformat()
 
             trace_complete = create_trace(
-                node="execute_task",
+                node=node,
                 action="execution_failed",
                 message=f"Failed: {task['title']} - {str(e)}",
-                task_id=task["id"]
+                task_id=task["id"],
+                timestamp=now
             )
 
-        # Update just this task in the list
-        updated_tasks = tasks.copy()
-        updated_tasks[task_index] = task
+        return task, [trace_start, trace_complete]
+
+    async def execute_task(self, state: AgentState) -> dict:
+        """
+        Execute the current task using LLM to generate real output.
+
+        The agent generates actual content/deliverables for each task
+        based on the task description and overall goal.
+        """
+        task_index = state["current_task_index"]
+        tasks = state["tasks"]
+        goal = state.get("goal", "")
+
+        if task_index < 0 or task_index >= len(tasks):
+            return {"error": "Invalid task index"}
+
+        task, traces = await self._run_task(
+            tasks[task_index],
+            goal,
+            cache_key=f"execute_task:{state.get('session_id', '')}"
+        )
+
+        # tasks_reducer merges by id, so only the updated task is returned
+        update = {
+            "tasks": [task],
+            "traces": traces,
+            **_status_deltas([task])
+        }
+
+        # The task has left the pending state either way
+        if state.get("pending_count") is not None:
+            update["pending_count"] = max(state["pending_count"] - 1, 0)
+
+        return update
+
+    async def execute_all_tasks(self, state: AgentState) -> dict:
+        """
+        Execute every pending task concurrently.
+
+        Used when tasks are independent: total latency becomes roughly the
+        slowest task instead of the sum of all of them. Concurrency is capped
+        by max_concurrency to respect provider rate limits.
+        """
+        tasks = state["tasks"]
+        goal = state.get("goal", "")
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        cache_key = f"execute_task:{state.get('session_id', '')}"
+
+        pending = [t for t in tasks if t["status"] == _PENDING]
+
+        async def run_one(task: dict) -> tuple[dict, list[dict]]:
+            async with semaphore:
+                return await self._run_task(
+                    task,
+                    goal,
+                    node="execute_all_tasks",
+                    cache_key=cache_key
+                )
+
+        results = await asyncio.gather(
+            *(run_one(t) for t in pending),
+            return_exceptions=True
+        )
+
+        updated = {t["id"]: t for t in tasks}
+        traces = []
+        now = datetime.now(timezone.utc)
+        for task, result in zip(pending, results):
+            if isinstance(result, BaseException):
+                failed = task.copy()
+                failed["status"] = _FAILED
+                failed["error"] = f"Execution failed: {str(result)}"
+                failed["completed_at"] = now.isoformat()
+                updated[task["id"]] = failed
+                traces.append(create_trace(
+                    node="execute_all_tasks",
+                    action="execution_failed",
+                    message=f"Failed: {task['title']} - {str(result)}",
+                    task_id=task["id"],
+                    timestamp=now
+                ))
+            else:
+                updated[task["id"]], task_traces = result
+                traces.extend(task_traces)
+
+        finished = [updated[t["id"]] for t in pending]
 
         return {
-            "tasks": updated_tasks,
-            "traces": [trace_start, trace_complete]
+            "tasks": list(updated.values()),
+            "pending_count": 0,
+            "traces": traces,
+            **_status_deltas(finished)
         }
 
+    async def execute_all_tasks_batched(self, state: AgentState) -> dict:
+        """
+        Execute every pending task with a single LLM call.
+
+        All tasks share the goal and system prompt, so one request returning
+        a JSON array of deliverables replaces a round trip per task. Tasks
+        the response doesn't cover, or all of them if it can't be parsed,
+        fall back to execute_all_tasks.
+        """
+        tasks = state["tasks"]
+        goal = state.get("goal", "")
+        pending = [t for t in tasks if t["status"] == _PENDING]
+        if not pending:
+            return {"pending_count": 0}
+
+        now = datetime.now(timezone.utc)
+        trace_start = create_trace(
+            node="execute_all_tasks_batched",
+            action="batch_started",
+            message=f"Executing {len(pending)} tasks in one request",
+            details={"task_count": len(pending)},
+            timestamp=now
+        )
+
+        prompt = _BATCH_EXECUTE_PROMPT.format_messages(
+            goal=goal,
+            tasks=orjson.dumps([
+                {"id": t["id"], "title": t["title"], "description": t["description"]}
+                for t in pending
+            ]).decode()
+        )
+        cache_key = f"execute_task:{state.get('session_id', '')}"
+        try:
+            response = await self.llm.ainvoke(prompt, prompt_cache_key=cache_key)
+            outputs = {
+                str(item["id"]): str(item["result"]).strip()
+                for item in orjson.loads(_strip_code_fence(response.content))
+            }
+        except Exception as e:
+            _evict_cached(self.llm, prompt, prompt_cache_key=cache_key)
+            trace_fallback = create_trace(
+                node="execute_all_tasks_batched",
+                action="batch_fallback",
+                message=f"Batched execution failed, running tasks individually: {str(e)}",
+                timestamp=datetime.now(timezone.utc)
+            )
+            update = await self.execute_all_tasks(state)
+            update["traces"] = [trace_start, trace_fallback] + update["traces"]
+            return update
+
+        finished_at = datetime.now(timezone.utc)
+        finished = []
+        remaining = []
+        traces = [trace_start]
+        for task in pending:
+            result_content = outputs.get(task["id"])
+            if result_content is None:
+                remaining.append(task)
+                continue
+
+            task = task.copy()
+            task["status"] = _COMPLETED
+            task["result"] = result_content
+            task["started_at"] = now.isoformat()
+            task["completed_at"] = finished_at.isoformat()
+            finished.append(task)
+            traces.append(create_trace(
+                node="execute_all_tasks_batched",
+                action="execution_success",
+                message=f"Completed: {task['title']}",
+                task_id=task["id"],
+                details={"output_length": len(result_content)},
+                timestamp=finished_at
+            ))
+
+        update = {
+            "tasks": finished,
+            "pending_count": 0,
+            "traces": traces,
+            **_status_deltas(finished)
+        }
+
+        if remaining:
+            retry = await self.execute_all_tasks({**state, "tasks": remaining})
+            update["tasks"] = finished + retry["tasks"]
+            update["traces"] = traces + retry["traces"]
+            update["completed_count"] += retry["completed_count"]
+            update["failed_count"] += retry["failed_count"]
+
+        return update
+
     async def reflect(self, state: AgentState) -> dict:
         """
         Reflect on the execution result and decide next action.
@@ -289,30 +591,38 @@ Please execute this task and provide the actual output/deliverable:""")
         task = tasks[task_index]
 
         # Count progress
-        completed = sum(1 for t in tasks if t["status"] == TaskStatus.COMPLETED.value)
-        failed = sum(1 for t in tasks if t["status"] == TaskStatus.FAILED.value)
+        completed, failed = _progress_counts(state)
         total = len(tasks)
 
-        # Generate reflection using LLM
-        prompt = ChatPromptTemplate.from_messages([
-            SystemMessage(content="""You are reflecting on task execution progress.
-Give a brief (1 sentence) status update on the completed task and overall progress.
-Be encouraging but factual."""),
-            HumanMessage(content=f"""
-Task completed: {task['title']}
-Status: {task['status']}
-Result: {task.get('result') or task.get('error', 'N/A')}
-
-Overall progress: {completed}/{total} completed, {failed} failed
-""")
-        ])
-
-        response = await self.llm.ainvoke(prompt.format_messages())
+        # Progress updates are templated from the counts above. Failures can
+        # optionally get an LLM-written reflection (verbose_reflection); if
+        # that call fails too, the templated message is recorded instead.
+        reflection = None
+        if self.verbose_reflection and task["status"] == _FAILED:
+            try:
+                response = await self.llm.ainvoke(
+                    _REFLECT_PROMPT.format_messages(
+                        title=task["title"],
+                        error=task.get("error", "N/A"),
+                        completed=completed,
+                        total=total,
+                        failed=failed
+                    ),
+                    prompt_cache_key="reflect"
+                )
+                reflection = response.content
+            except Exception:
+                reflection = None
+        if reflection is None:
+            verb = "Failed" if task["status"] == _FAILED else "Completed"
+            reflection = f"{verb} {task['title']}: {completed}/{total} done"
+            if failed:
+                reflection += f", {failed} failed"
 
         trace = create_trace(
             node="reflect",
             action="reflection",
-            message=response.content,
+            message=reflection,
             task_id=task["id"],
             details={
                 "completed": completed,
@@ -324,7 +634,7 @@ Overall progress: {completed}/{total} completed, {failed} failed
 
         return {
             "phase": ExecutionPhase.REFLECTING.value,
-            "messages": [AIMessage(content=response.content)],
+            "messages": [AIMessage(content=reflection)],
             "traces": [trace]
         }
 
@@ -333,8 +643,7 @@ Overall progress: {completed}/{total} completed, {failed} failed
         Final node - summarize execution results.
         """
         tasks = state["tasks"]
-        completed = sum(1 for t in tasks if t["status"] == TaskStatus.COMPLETED.value)
-        failed = sum(1 for t in tasks if t["status"] == TaskStatus.FAILED.value)
+        completed, failed = _progress_counts(state)
 
         summary = f"✅ Execution complete!\n\n"
         summary += f"**Results:** {completed}/{len(tasks)} tasks completed"
@@ -343,7 +652,7 @@ Overall progress: {completed}/{total} completed, {failed} failed
         summary += "\n\n**Task Summary:**\n"
 
         for task in tasks:
-            status_emoji = "✓" if task["status"] == TaskStatus.COMPLETED.value else "✗"
+            status_emoji = "✓" if task["status"] == _COMPLETED else "✗"
             summary += f"- {status_emoji} {task['title']}\n"
 
         trace = create_trace(
@@ -3,6 +3,7 @@ LangGraph State Definition.
 Strongly typed state with clear semantics for the TODO executor agent.
 """
 
+import operator
 from typing import Annotated, Literal, Optional, Sequence
 from typing_extensions import TypedDict
 from langchain_core.messages import BaseMessage
@@ -35,9 +36,15 @@ class Task(BaseModel):
 
     @classmethod
     def create(cls, title: str, description: str) -> "Task":
-        """Factory method to create a new task."""
-        return cls(
-            id=str(uuid.uuid4())[:8],
+        """
+        Factory method to create a new task.
+
+        Model validation is skipped, so callers must pass strings; the
+        planner's JSON is type-checked in analyze_and_plan before it gets
+        here. Unset fields take their defaults.
+        """
+        return cls.model_construct(
+            id=uuid.uuid4().hex[:8],
             title=title,
             description=description
         )
@@ -69,17 +76,24 @@ class ExecutionPhase(str, Enum):
 def tasks_reducer(existing: list[dict], new: list[dict]) -> list[dict]:
     """
     Smart merge for tasks list.
-    If new has same ID, update. Otherwise append.
+    If new has same ID, update in place. Otherwise append.
+    Existing tasks keep their position, so the UI order is stable.
     """
     if not existing:
         return new
     if not new:
         return existing
 
-    existing_map = {t["id"]: t for t in existing}
+    id_to_idx = {t["id"]: i for i, t in enumerate(existing)}
+    result = list(existing)
     for task in new:
-        existing_map[task["id"]] = task
-    return list(existing_map.values())
+        idx = id_to_idx.get(task["id"])
+        if idx is None:
+            id_to_idx[task["id"]] = len(result)
+            result.append(task)
+        else:
+            result[idx] = task
+    return result
 
 
 # Custom reducer for traces - always append
@@ -111,6 +125,15 @@ class AgentState(TypedDict):
     # Current task index being executed
     current_task_index: int
 
+    # Number of tasks still pending, kept in sync by the nodes so routing
+    # doesn't have to scan the task list
+    pending_count: int
+
+    # Running totals of finished tasks. Nodes return deltas which are summed,
+    # so progress reads don't need a pass over the task list
+    completed_count: Annotated[int, operator.add]
+    failed_count: Annotated[int, operator.add]
+
     # Execution phase for UI visualization
     phase: str  # ExecutionPhase value
 
@@ -132,6 +155,9 @@ def create_initial_state(session_id: str, goal: str = "") -> AgentState:
         goal=goal,
         tasks=[],
         current_task_index=-1,
+        pending_count=0,
+        completed_count=0,
+        failed_count=0,
         phase=ExecutionPhase.IDLE.value,
         traces=[],
         is_paused=False,
@@ -1,6 +1,14 @@
 """API module."""
 
-from .routes import router
 from .schemas import *
 
 __all__ = ["router"]
+
+
+def __getattr__(name):
+    # Importing the router pulls in FastAPI and the SSE stack; defer it so
+    # that using only the schemas stays a pydantic-only import
+    if name == "router":
+        from .routes import router
+        return router
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -8,22 +8,18 @@ Features:
 """
 
 import asyncio
-import json
+import time
 import uuid
-from datetime import datetime
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
 from typing import AsyncGenerator
 
-
-class DateTimeEncoder(json.JSONEncoder):
-    """Custom JSON encoder that handles datetime objects."""
-    def default(self, obj):
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        return super().default(obj)
-
+import orjson
 from fastapi import APIRouter, HTTPException, Depends
-from fastapi.responses import StreamingResponse
-from sse_starlette.sse import EventSourceResponse
+from fastapi.responses import Response, StreamingResponse
+from pydantic import TypeAdapter
+from sse_starlette.sse import EventSourceResponse, ServerSentEvent
 
 from .schemas import (
     StartExecutionRequest,
@@ -31,8 +27,9 @@ from .schemas import (
     SessionResponse,
     SessionListItem,
     HealthResponse,
+    ExecutionStartedResponse,
+    SessionStatusResponse,
 )
-from ..agent import create_agent, TaskStatus
 from ..core.config import get_settings, Settings
 
 router = APIRouter()
@@ -40,45 +37,230 @@ router = APIRouter()
 # Global agent instance (initialized lazily on first request)
 # Reset by restarting server or modifying this file
 _agent = None
-_event_queues: dict[str, asyncio.Queue] = {}
 _agent_initialized = False
+_agent_init_lock = asyncio.Lock()
+
+# Seconds between keepalive pings on open SSE streams
+KEEPALIVE_INTERVAL = 15.0
+
+# Health responses are constant, so they are encoded once
+_HEALTH_BYTES = orjson.dumps(HealthResponse().model_dump())
+
+# Serializer for GET /sessions, built once rather than per response
+_SESSIONS_ADAPTER = TypeAdapter(list[SessionListItem])
+
+# Running run_agent/resume_agent tasks; the event loop only keeps weak
+# references, so these keep them alive until they finish
+_run_tasks: set[asyncio.Task] = set()
+
+# Events that end a stream; never subject to the buffer bound
+_TERMINAL_EVENTS = ("complete", "error")
+
+
+# Last whole second formatted by _now_iso, as (epoch second, ISO string)
+_now_cache: tuple[int, str] = (0, "")
+
+
+def _now_iso() -> str:
+    """
+    Current UTC time as an ISO 8601 string, to the second.
+
+    Connection and keepalive timestamps only need second precision, so the
+    formatted string is reused until the clock moves to the next second.
+    """
+    global _now_cache
+    second = int(time.time())
+    if _now_cache[0] != second:
+        _now_cache = (
+            second,
+            datetime.fromtimestamp(second, timezone.utc).isoformat()
+        )
+    return _now_cache[1]
+
+
+def _dumps(data) -> bytes:
+    """Encode an SSE payload; naive datetimes are UTC throughout the API."""
+    return orjson.dumps(data, option=orjson.OPT_NAIVE_UTC)
+
+
+def _sse_frame(event: str, data: bytes) -> bytes:
+    """
+    Frame an event for the wire.
+
+    EventSourceResponse passes bytes through untouched, skipping its
+    per-event ServerSentEvent/StringIO encode. orjson never emits raw
+    newlines, so the payload is always a single data line.
+    """
+    return b"event: " + event.encode() + b"\r\ndata: " + data + b"\r\n\r\n"
+
+
+@dataclass
+class SessionChannel:
+    """
+    Event buffer between a session's producers and its SSE consumer.
+
+    Producers append and set ``ready``; the consumer sleeps on it with no
+    timeout and drains everything buffered per wakeup. An Event rather than
+    a Condition so that put() stays synchronous: producers publish between
+    their own awaits, and Condition.notify() would need the lock acquired
+    with an await first.
+
+    Events are never dropped. A consumer that stays more than ``maxsize``
+    events behind for longer than ``timeout`` seconds is evicted instead:
+    the channel is marked slow and closed, and the client is told to
+    reconnect. Terminal events always fit.
+    """
+    maxsize: int = 100
+    timeout: float = 5.0
+    events: deque = field(default_factory=deque)
+    ready: asyncio.Event = field(default_factory=asyncio.Event)
+    closed: bool = False
+    slow: bool = False
+    _full_since: float | None = None
+
+    def put(self, event: dict):
+        """Buffer an event and wake the consumer."""
+        self.put_many((event,))
+
+    def put_many(self, events: list[dict] | tuple[dict, ...]):
+        """Buffer a burst of events with a single wakeup and backlog check."""
+        if self.closed or not events:
+            return
+        self.events.extend(events)
+        self.ready.set()
+
+        if len(self.events) <= self.maxsize or events[-1]["event"] in _TERMINAL_EVENTS:
+            self._full_since = None
+            return
+        now = time.monotonic()
+        if self._full_since is None:
+            self._full_since = now
+        elif now - self._full_since > self.timeout:
+            self.slow = True
+            self.closed = True
+
+    async def wait(self):
+        """Wait until at least one event is buffered or the channel closes."""
+        while not self.events and not self.closed:
+            self.ready.clear()
+            await self.ready.wait()
+
+
+_channels: dict[str, SessionChannel] = {}
+
+
+def _open_channel(session_id: str) -> SessionChannel:
+    """Return the session's channel, creating it if needed."""
+    channel = _channels.get(session_id)
+    if channel is None or channel.closed:
+        settings = get_settings()
+        channel = _channels[session_id] = SessionChannel(
+            maxsize=settings.sse_max_queue_size,
+            timeout=settings.sse_queue_timeout
+        )
+    return channel
+
+
+def _close_channel(session_id: str, channel: SessionChannel):
+    """Mark a consumer's channel closed and drop it from the registry."""
+    channel.closed = True
+    # Wake any other consumer of the channel so it sees the close
+    channel.ready.set()
+    if _channels.get(session_id) is channel:
+        del _channels[session_id]
+
+
+def _ping_message() -> ServerSentEvent:
+    """Keepalive frame sent by EventSourceResponse while a stream is idle."""
+    return ServerSentEvent(
+        event="ping",
+        data=_dumps({"timestamp": _now_iso()}).decode()
+    )
+
+
+async def _stream_channel(channel: SessionChannel) -> AsyncGenerator[bytes, None]:
+    """Yield SSE frames from a channel until the run completes or errors."""
+    while True:
+        await channel.wait()
+        # Emit the whole burst before sleeping again
+        while channel.events and not channel.slow:
+            event = channel.events.popleft()
+            data = event["data"]
+            # Run events arrive pre-encoded; only other payloads need it
+            yield _sse_frame(
+                event["event"],
+                data if isinstance(data, bytes) else _dumps(data)
+            )
+            if event["event"] in _TERMINAL_EVENTS:
+                return
+
+        if channel.slow:
+            channel.events.clear()
+            yield _sse_frame("error", _dumps({
+                "error": "Client fell too far behind the event stream; reconnect to resume"
+            }))
+            return
+
+        # Another connection on this session closed the channel
+        if channel.closed and not channel.events:
+            return
+
+
+def _start_run(coro) -> asyncio.Task:
+    """Run a session's agent coroutine in the background, keeping a reference."""
+    task = asyncio.create_task(coro)
+    _run_tasks.add(task)
+    task.add_done_callback(_run_tasks.discard)
+    return task
 
 
 async def get_agent():
     """Dependency to get the agent instance."""
     global _agent
     if _agent is None:
-        settings = get_settings()
-        _agent = await create_agent(
-            openai_api_key=settings.openai_api_key,
-            model=settings.openai_model,
-            db_path="checkpoints.db",
-            on_event=broadcast_event
-        )
+        # Concurrent first requests must not each open a DB connection and
+        # HTTP pool; only one initializes, the rest wait and reuse it
+        async with _agent_init_lock:
+            if _agent is None:
+                # LangGraph/LangChain load here rather than at app import, so
+                # startup and test collection don't pay for them up front
+                from ..agent import create_agent
+                settings = get_settings()
+                if not settings.openai_api_key:
+                    raise HTTPException(
+                        status_code=503,
+                        detail="OPENAI_API_KEY is not configured"
+                    )
+                _agent = await create_agent(
+                    openai_api_key=settings.openai_api_key,
+                    model=settings.openai_model,
+                    temperature=settings.openai_temperature,
+                    db_path="checkpoints.db",
+                    parallel_execution=settings.parallel_execution,
+                    max_concurrency=settings.max_concurrency,
+                    verbose_reflection=settings.verbose_reflection,
+                    batched_execution=settings.batched_execution
+                )
     return _agent
 
 
-def broadcast_event(event_type: str, data: dict):
-    """Broadcast an event to all connected SSE clients for this session."""
-    session_id = data.get("session_id")
-    if session_id and session_id in _event_queues:
-        try:
-            _event_queues[session_id].put_nowait({
-                "event": event_type,
-                "data": data,
-                "timestamp": datetime.utcnow().isoformat()
-            })
-        except asyncio.QueueFull:
-            pass  # Drop event if queue is full
+async def close_agent():
+    """Close the shared agent, if one was created, and forget it."""
+    global _agent
+    async with _agent_init_lock:
+        if _agent is not None:
+            agent, _agent = _agent, None
+            await agent.aclose()
 
 
 @router.get("/health", response_model=HealthResponse)
 async def health_check():
     """Health check endpoint."""
-    return HealthResponse()
+    # The payload never changes; the response_model only documents it
+    return Response(_HEALTH_BYTES, media_type="application/json")
 
 
-@router.post("/execute")
+@router.post("/execute", response_model=ExecutionStartedResponse)
 async def start_execution(
     request: StartExecutionRequest,
     agent=Depends(get_agent)
@@ -90,14 +272,14 @@ async def start_execution(
     """
     session_id = request.session_id or str(uuid.uuid4())
 
-    # Initialize event queue for this session
-    _event_queues[session_id] = asyncio.Queue(maxsize=100)
+    # Initialize event channel for this session
+    _open_channel(session_id)
 
-    return {
-        "session_id": session_id,
-        "goal": request.goal,
-        "stream_url": f"/api/stream/{session_id}"
-    }
+    return ExecutionStartedResponse(
+        session_id=session_id,
+        goal=request.goal,
+        stream_url=f"/api/stream/{session_id}"
+    )
 
 
 @router.get("/stream/{session_id}")
@@ -125,133 +307,126 @@ async def stream_execution(
     - error: Error occurred
     """
 
-    async def event_generator() -> AsyncGenerator[dict, None]:
+    async def event_generator() -> AsyncGenerator[bytes, None]:
         """Generate SSE events from agent execution."""
 
-        # Create queue for this session if not exists
-        if session_id not in _event_queues:
-            _event_queues[session_id] = asyncio.Queue(maxsize=100)
-
-        queue = _event_queues[session_id]
+        # Create channel for this session if not exists
+        channel = _open_channel(session_id)
+        run = None
 
         try:
             # Send initial connection event
-            yield {
-                "event": "connected",
-                "data": json.dumps({
-                    "session_id": session_id,
-                    "timestamp": datetime.utcnow().isoformat()
-                })
-            }
+            yield _sse_frame("connected", _dumps({
+                "session_id": session_id,
+                "timestamp": _now_iso()
+            }))
 
             # Start agent execution in background if goal provided
             if goal:
-                asyncio.create_task(run_agent(session_id, goal, agent, queue))
-
-            # Stream events from queue
-            while True:
-                try:
-                    # Wait for events with timeout
-                    event = await asyncio.wait_for(queue.get(), timeout=30.0)
-
-                    yield {
-                        "event": event["event"],
-                        "data": json.dumps(event["data"], cls=DateTimeEncoder)
-                    }
-
-                    # Check if execution is complete
-                    if event["event"] in ("complete", "error"):
-                        break
-
-                except asyncio.TimeoutError:
-                    # Send keepalive ping
-                    yield {
-                        "event": "ping",
-                        "data": json.dumps({"timestamp": datetime.utcnow().isoformat()})
-                    }
+                run = _start_run(run_agent(session_id, goal, agent, channel))
+
+            # Stream events from the channel
+            async for event in _stream_channel(channel):
+                yield event
 
         finally:
-            # Cleanup queue when client disconnects
-            if session_id in _event_queues:
-                del _event_queues[session_id]
+            # A client that disconnects stops its run; progress so far is
+            # checkpointed and can be picked up via the resume endpoint
+            if run is not None:
+                run.cancel()
+            _close_channel(session_id, channel)
+
+    return EventSourceResponse(
+        event_generator(),
+        ping=KEEPALIVE_INTERVAL,
+        ping_message_factory=_ping_message
+    )
+
+
+def _session_json(sid_json: bytes, payload: dict = None) -> bytes:
+    """
+    Encode an event payload followed by the pre-encoded session_id member.
+
+    Every event of a run carries the same session_id, so producers encode
+    that fragment once and the SSE consumer frames the bytes as is.
+    """
+    if not payload:
+        return b"{" + sid_json + b"}"
+    return _dumps(payload)[:-1] + b"," + sid_json + b"}"
+
+
+def _publish_update(channel: SessionChannel, sid_json: bytes, update: dict):
+    """
+    Translate one graph update into SSE events on the session channel.
+
+    The update's events are built first and handed over as one burst, so
+    the consumer is woken once per update rather than per event.
+    """
+    events = []
+    for node_name, node_output in update.items():
+        # Send node completion event
+        events.append({
+            "event": "node_end",
+            "data": _session_json(sid_json, {"node": node_name})
+        })
+
+        # Send specific updates based on what changed
+        if "tasks" in node_output:
+            events.append({
+                "event": "tasks_update",
+                "data": _session_json(sid_json, {"tasks": node_output["tasks"]})
+            })
+
+        if "phase" in node_output:
+            events.append({
+                "event": "phase_change",
+                "data": _session_json(sid_json, {"phase": node_output["phase"]})
+            })
+
+        if "traces" in node_output:
+            events.extend(
+                {"event": "trace", "data": _session_json(sid_json, {"trace": trace})}
+                for trace in node_output["traces"]
+            )
+
+        if "messages" in node_output:
+            events.extend(
+                {
+                    "event": "message",
+                    "data": _session_json(
+                        sid_json, {"role": "assistant", "content": msg.content}
+                    )
+                }
+                for msg in node_output["messages"]
+            )
 
-    return EventSourceResponse(event_generator())
+    channel.put_many(events)
 
 
-async def run_agent(session_id: str, goal: str, agent, queue: asyncio.Queue):
-    """Run the agent and push events to the queue."""
+async def run_agent(session_id: str, goal: str, agent, channel: SessionChannel):
+    """Run the agent and push events to the session channel."""
+    sid_json = b'"session_id":' + _dumps(session_id)
     try:
         # Send phase change event
-        await queue.put({
+        channel.put({
             "event": "phase_change",
-            "data": {"phase": "analyzing", "session_id": session_id}
+            "data": _session_json(sid_json, {"phase": "analyzing"})
         })
 
         async for update in agent.run(session_id, goal):
             # Process each state update from the agent
-            for node_name, node_output in update.items():
-                # Send node completion event
-                await queue.put({
-                    "event": "node_end",
-                    "data": {
-                        "node": node_name,
-                        "session_id": session_id
-                    }
-                })
-
-                # Send specific updates based on what changed
-                if "tasks" in node_output:
-                    await queue.put({
-                        "event": "tasks_update",
-                        "data": {
-                            "tasks": node_output["tasks"],
-                            "session_id": session_id
-                        }
-                    })
-
-                if "phase" in node_output:
-                    await queue.put({
-                        "event": "phase_change",
-                        "data": {
-                            "phase": node_output["phase"],
-                            "session_id": session_id
-                        }
-                    })
-
-                if "traces" in node_output:
-                    for trace in node_output["traces"]:
-                        await queue.put({
-                            "event": "trace",
-                            "data": {
-                                "trace": trace,
-                                "session_id": session_id
-                            }
-                        })
-
-                if "messages" in node_output:
-                    for msg in node_output["messages"]:
-                        await queue.put({
-                            "event": "message",
-                            "data": {
-                                "role": "assistant",
-                                "content": msg.content,
-                                "session_id": session_id
-                            }
-                        })
+            _publish_update(channel, sid_json, update)
 
         # Send completion event
-        await queue.put({
+        channel.put({
             "event": "complete",
-            "data": {"session_id": session_id}
+            "data": _session_json(sid_json)
         })
 
     except Exception as e:
-        await queue.put({
+        channel.put({
             "event": "error",
-            "data": {
-                "error": str(e),
-                "session_id": session_id
-            }
+            "data": _session_json(sid_json, {"error": str(e)})
         })
 
 
@@ -259,8 +434,10 @@ async def run_agent(session_id: str, goal: str, agent, queue: asyncio.Queue):
 async def list_sessions(agent=Depends(get_agent)):
     """List all available sessions for resume."""
     sessions = await agent.list_sessions()
-    return [
-        SessionListItem(
+    # Built by the agent from checkpoint state, so field validation is
+    # skipped here; the shared adapter serializes the list in one pass
+    return Response(_SESSIONS_ADAPTER.dump_json([
+        SessionListItem.model_construct(
             session_id=s["session_id"],
             goal=s["goal"],
             phase=s["phase"],
@@ -268,7 +445,7 @@ async def list_sessions(agent=Depends(get_agent)):
             completed_count=s["completed_count"]
         )
         for s in sessions
-    ]
+    ]), media_type="application/json")
 
 
 @router.get("/session/{session_id}", response_model=SessionResponse)
@@ -290,12 +467,46 @@ async def get_session(session_id: str, agent=Depends(get_agent)):
     )
 
 
-@router.post("/session/{session_id}/pause")
+@router.get("/session/{session_id}/stream")
+async def stream_session(session_id: str, agent=Depends(get_agent)):
+    """
+    Stream a session as NDJSON for incremental loading.
+
+    The first line holds the session fields plus task/trace counts; it is
+    followed by one {"task": ...} line per task, then one {"trace": ...}
+    line per trace. Prefer this over GET /session/{id} for long sessions.
+    """
+    state = await agent.get_state(session_id)
+
+    if not state:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    option = orjson.OPT_NAIVE_UTC | orjson.OPT_APPEND_NEWLINE
+
+    async def lines() -> AsyncGenerator[bytes, None]:
+        yield orjson.dumps({
+            "session_id": state["session_id"],
+            "goal": state["goal"],
+            "phase": state["phase"],
+            "is_paused": state["is_paused"],
+            "error": state.get("error"),
+            "task_count": len(state["tasks"]),
+            "trace_count": len(state["traces"])
+        }, option=option)
+        for task in state["tasks"]:
+            yield orjson.dumps({"task": task}, option=option)
+        for trace in state["traces"]:
+            yield orjson.dumps({"trace": trace}, option=option)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@router.post("/session/{session_id}/pause", response_model=SessionStatusResponse)
 async def pause_session(session_id: str, agent=Depends(get_agent)):
     """Pause execution of a session."""
     # In a full implementation, this would set is_paused=True
     # and the agent would check this before each task
-    return {"status": "paused", "session_id": session_id}
+    return SessionStatusResponse(status="paused", session_id=session_id)
 
 
 @router.get("/session/{session_id}/resume")
@@ -312,112 +523,64 @@ async def resume_session_stream(
 
     This streams the continued execution like the main stream endpoint.
     """
-    async def event_generator() -> AsyncGenerator[dict, None]:
-        # Create queue for this session
-        if session_id not in _event_queues:
-            _event_queues[session_id] = asyncio.Queue(maxsize=100)
-
-        queue = _event_queues[session_id]
+    async def event_generator() -> AsyncGenerator[bytes, None]:
+        # Create channel for this session
+        channel = _open_channel(session_id)
+        run = None
 
         try:
             # Send initial connection event
-            yield {
-                "event": "connected",
-                "data": json.dumps({
-                    "session_id": session_id,
-                    "resuming": True,
-                    "timestamp": datetime.utcnow().isoformat()
-                })
-            }
+            yield _sse_frame("connected", _dumps({
+                "session_id": session_id,
+                "resuming": True,
+                "timestamp": _now_iso()
+            }))
 
             # Start resume in background with optional user input
-            asyncio.create_task(resume_agent(session_id, agent, queue, user_input))
-
-            # Stream events from queue
-            while True:
-                try:
-                    event = await asyncio.wait_for(queue.get(), timeout=30.0)
-
-                    yield {
-                        "event": event["event"],
-                        "data": json.dumps(event["data"], cls=DateTimeEncoder)
-                    }
+            run = _start_run(resume_agent(session_id, agent, channel, user_input))
 
-                    if event["event"] in ("complete", "error"):
-                        break
-
-                except asyncio.TimeoutError:
-                    yield {
-                        "event": "ping",
-                        "data": json.dumps({"timestamp": datetime.utcnow().isoformat()})
-                    }
+            # Stream events from the channel
+            async for event in _stream_channel(channel):
+                yield event
 
         finally:
-            if session_id in _event_queues:
-                del _event_queues[session_id]
-
-    return EventSourceResponse(event_generator())
+            if run is not None:
+                run.cancel()
+            _close_channel(session_id, channel)
+
+    return EventSourceResponse(
+        event_generator(),
+        ping=KEEPALIVE_INTERVAL,
+        ping_message_factory=_ping_message
+    )
 
 
-async def resume_agent(session_id: str, agent, queue: asyncio.Queue, user_input: str = None):
+async def resume_agent(session_id: str, agent, channel: SessionChannel, user_input: str = None):
     """Resume agent execution from checkpoint with optional user input."""
+    sid_json = b'"session_id":' + _dumps(session_id)
     try:
         # Send phase change
-        await queue.put({
+        channel.put({
             "event": "phase_change",
-            "data": {"phase": "executing", "session_id": session_id}
+            "data": _session_json(sid_json, {"phase": "executing"})
         })
 
         # If user provided input, add it as a message
         if user_input:
-            await queue.put({
+            channel.put({
                 "event": "message",
-                "data": {
-                    "role": "user",
-                    "content": user_input,
-                    "session_id": session_id
-                }
+                "data": _session_json(sid_json, {"role": "user", "content": user_input})
             })
 
         async for update in agent.resume(session_id, user_input=user_input):
-            for node_name, node_output in update.items():
-                await queue.put({
-                    "event": "node_end",
-                    "data": {"node": node_name, "session_id": session_id}
-                })
-
-                if "tasks" in node_output:
-                    await queue.put({
-                        "event": "tasks_update",
-                        "data": {"tasks": node_output["tasks"], "session_id": session_id}
-                    })
-
-                if "phase" in node_output:
-                    await queue.put({
-                        "event": "phase_change",
-                        "data": {"phase": node_output["phase"], "session_id": session_id}
-                    })
-
-                if "traces" in node_output:
-                    for trace in node_output["traces"]:
-                        await queue.put({
-                            "event": "trace",
-                            "data": {"trace": trace, "session_id": session_id}
-                        })
-
-                if "messages" in node_output:
-                    for msg in node_output["messages"]:
-                        await queue.put({
-                            "event": "message",
-                            "data": {"role": "assistant", "content": msg.content, "session_id": session_id}
-                        })
-
-        await queue.put({
+            _publish_update(channel, sid_json, update)
+
+        channel.put({
             "event": "complete",
-            "data": {"session_id": session_id}
+            "data": _session_json(sid_json)
         })
     except Exception as e:
-        await queue.put({
+        channel.put({
             "event": "error",
-            "data": {"error": str(e), "session_id": session_id}
+            "data": _session_json(sid_json, {"error": str(e)})
         })
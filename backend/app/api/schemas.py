@@ -66,6 +66,19 @@ class SessionListItem(BaseModel):
     created_at: Optional[datetime] = None
 
 
+class ExecutionStartedResponse(BaseModel):
+    """A newly created execution session and where to stream it from."""
+    session_id: str
+    goal: str
+    stream_url: str
+
+
+class SessionStatusResponse(BaseModel):
+    """Result of a session control action."""
+    status: str
+    session_id: str
+
+
 # ============ SSE Event Schemas ============
 
 class SSEEvent(BaseModel):
@@ -15,9 +15,21 @@ class Settings(BaseSettings):
     app_name: str = "TODO Executor Agent"
     debug: bool = False
 
-    # OpenAI
-    openai_api_key: str
+    # OpenAI (checked when the agent is first created, not at import)
+    openai_api_key: str = ""
     openai_model: str = "gpt-4.1-mini"
+    openai_temperature: float = 0.7
+
+    # Agent execution
+    parallel_execution: bool = False
+    max_concurrency: int = 4
+    verbose_reflection: bool = False
+    batched_execution: bool = False
+
+    # SSE streaming: a client more than sse_max_queue_size events behind for
+    # longer than sse_queue_timeout seconds is disconnected
+    sse_max_queue_size: int = 100
+    sse_queue_timeout: float = 5.0
 
     # Database
     database_url: str = "sqlite:///./checkpoints.db"
@@ -30,14 +42,14 @@ class Settings(BaseSettings):
     # Server
     host: str = "0.0.0.0"
     port: int = 8000
-    cors_origins: list[str] = ["http://localhost:3000"]
+    cors_origins: tuple[str, ...] = ("http://localhost:3000",)
 
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
 
 
-@lru_cache()
+@lru_cache(maxsize=1)
 def get_settings() -> Settings:
     """Cached settings instance."""
     return Settings()
@@ -6,7 +6,9 @@ with real-time streaming, persistence, and human-in-the-loop control.
 """
 
 import logging
+import queue
 from contextlib import asynccontextmanager
+from logging.handlers import QueueHandler, QueueListener
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -14,17 +16,25 @@ from fastapi.middleware.cors import CORSMiddleware
 from .api.routes import router as api_router
 from .core.config import get_settings
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+# Configure logging. Handlers write from a background listener thread so
+# log I/O never blocks the event loop; request code only enqueues records.
+# The listener runs for the app's lifespan.
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(
+    logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 )
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_log_listener = QueueListener(_log_queue, _log_handler)
+_queue_handler = QueueHandler(_log_queue)
+_queue_handler.setFormatter(logging.Formatter("%(message)s"))
+logging.basicConfig(level=logging.INFO, handlers=[_queue_handler])
 logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager."""
+    _log_listener.start()
     settings = get_settings()
     logger.info(f"Starting {settings.app_name}")
     logger.info(f"Debug mode: {settings.debug}")
@@ -41,6 +51,14 @@ async def lifespan(app: FastAPI):
 
     logger.info("Shutting down...")
 
+    # Stop WAL maintenance and release the checkpoint DB connection
+    from .api import routes
+    try:
+        await routes.close_agent()
+    finally:
+        # Flush queued records and join the listener thread
+        _log_listener.stop()
+
 
 def create_app() -> FastAPI:
     """Application factory."""
@@ -3,35 +3,81 @@ Pytest configuration and fixtures for backend tests.
 """
 
 import asyncio
-import os
+from types import MappingProxyType
+
 import pytest
+import pytest_asyncio
+from fastapi.testclient import TestClient
 from httpx import AsyncClient, ASGITransport
 from unittest.mock import AsyncMock, MagicMock, patch
 
-# Set test environment variables before importing app
-os.environ["OPENAI_API_KEY"] = "test-api-key-for-testing"
-os.environ["OPENAI_MODEL"] = "gpt-4o-mini"
-
 from app.main import app
-from app.agent import TaskStatus
+from app.agent import TaskStatus, create_agent
+from app.api import routes
+from app.core.config import Settings
+
+
+@pytest.fixture(scope="session", autouse=True)
+def test_settings():
+    """Settings with a placeholder API key, leaving the environment untouched."""
+    settings = Settings(openai_api_key="test-api-key-for-testing", openai_model="gpt-4o-mini")
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(routes, "get_settings", lambda: settings)
+        yield settings
 
 
 @pytest.fixture(scope="session")
-def event_loop():
-    """Create an instance of the default event loop for the test session."""
-    loop = asyncio.get_event_loop_policy().new_event_loop()
-    yield loop
-    loop.close()
+def event_loop_policy():
+    """Run async tests on uvloop, like the server, where it is installed."""
+    try:
+        import uvloop
+    except ImportError:
+        return asyncio.DefaultEventLoopPolicy()
+    return uvloop.EventLoopPolicy()
 
 
-@pytest.fixture
-async def async_client():
-    """Create async HTTP client for testing FastAPI endpoints."""
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def api_agent(test_settings, tmp_path_factory):
+    """
+    The agent behind the API routes, on a temporary per-worker database.
+
+    Closed at the end of the session; an open aiosqlite connection would
+    otherwise keep its worker thread alive and hang interpreter exit.
+    """
+    agent = await create_agent(
+        openai_api_key=test_settings.openai_api_key,
+        model=test_settings.openai_model,
+        db_path=str(tmp_path_factory.mktemp("db") / "checkpoints.db")
+    )
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(routes, "_agent", agent)
+        yield agent
+    await agent.aclose()
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def async_client(api_agent):
+    """Async HTTP client for testing FastAPI endpoints, shared by the session."""
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as client:
         yield client
 
 
+@pytest.fixture(scope="session")
+def client(api_agent):
+    """Synchronous client for single-shot tests that need no shared async state."""
+    # Not entered as a context manager: that would run the app lifespan,
+    # whose shutdown closes the agent the async tests share
+    return TestClient(app)
+
+
+@pytest.fixture
+def isolated_channels(monkeypatch):
+    """Give a test its own SSE channel registry, restored afterwards."""
+    monkeypatch.setattr(routes, "_channels", dict(routes._channels))
+    return routes._channels
+
+
 @pytest.fixture
 def mock_llm():
     """Mock LLM for testing without actual API calls."""
@@ -42,35 +88,41 @@ def mock_llm():
     return mock
 
 
-@pytest.fixture
-def sample_tasks():
-    """Sample task data for testing."""
-    return [
-        {
+@pytest.fixture(scope="module")
+def _base_sample_tasks():
+    """Read-only task templates, built once per module."""
+    return (
+        MappingProxyType({
             "id": "task-1",
             "title": "Research topic",
             "description": "Research the main topic",
             "status": TaskStatus.PENDING.value,
             "result": None,
             "error": None,
-        },
-        {
+        }),
+        MappingProxyType({
             "id": "task-2",
             "title": "Write content",
             "description": "Write the main content",
             "status": TaskStatus.PENDING.value,
             "result": None,
             "error": None,
-        },
-        {
+        }),
+        MappingProxyType({
             "id": "task-3",
             "title": "Review and finalize",
             "description": "Review and finalize the output",
             "status": TaskStatus.PENDING.value,
             "result": None,
             "error": None,
-        },
-    ]
+        }),
+    )
+
+
+@pytest.fixture
+def sample_tasks(_base_sample_tasks):
+    """Sample task data for testing; fresh dicts each test may mutate."""
+    return [dict(task) for task in _base_sample_tasks]
 
 
 @pytest.fixture
@@ -0,0 +1,85 @@
+"""
+Tests for the LLM response cache.
+"""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from langchain_core.messages import HumanMessage, SystemMessage
+from app.agent.cache import CachingLLM
+
+
+def make_llm(temperature: float) -> AsyncMock:
+    llm = AsyncMock()
+    llm.temperature = temperature
+    llm.ainvoke.return_value = MagicMock(content="cached answer")
+    return llm
+
+
+MESSAGES = [SystemMessage(content="system"), HumanMessage(content="Goal: test")]
+
+
+class TestCachingLLM:
+    """Tests for CachingLLM."""
+
+    async def test_deterministic_model_is_cached(self):
+        """Test that repeated prompts hit the cache at temperature 0."""
+        llm = make_llm(0)
+        cached = CachingLLM(llm)
+
+        first = await cached.ainvoke(MESSAGES)
+        second = await cached.ainvoke(MESSAGES)
+
+        assert first is second
+        llm.ainvoke.assert_awaited_once()
+
+    async def test_sampling_model_is_not_cached(self):
+        """Test that models with temperature > 0 always call through."""
+        llm = make_llm(0.7)
+        cached = CachingLLM(llm)
+
+        await cached.ainvoke(MESSAGES)
+        await cached.ainvoke(MESSAGES)
+
+        assert llm.ainvoke.await_count == 2
+
+    async def test_different_prompts_miss(self):
+        """Test that a different user message is a cache miss."""
+        llm = make_llm(0)
+        cached = CachingLLM(llm)
+
+        await cached.ainvoke(MESSAGES)
+        await cached.ainvoke([MESSAGES[0], HumanMessage(content="Goal: other")])
+
+        assert llm.ainvoke.await_count == 2
+
+    async def test_evicted_entry_calls_model_again(self):
+        """Test that evict() drops the response for that prompt and kwargs."""
+        llm = make_llm(0)
+        cached = CachingLLM(llm)
+
+        await cached.ainvoke(MESSAGES, prompt_cache_key="plan")
+        cached.evict(MESSAGES, prompt_cache_key="plan")
+        await cached.ainvoke(MESSAGES, prompt_cache_key="plan")
+
+        assert llm.ainvoke.await_count == 2
+
+    async def test_expired_entries_are_refreshed(self):
+        """Test that entries older than the TTL are not served."""
+        llm = make_llm(0)
+        cached = CachingLLM(llm, ttl=0)
+
+        await cached.ainvoke(MESSAGES)
+        await cached.ainvoke(MESSAGES)
+
+        assert llm.ainvoke.await_count == 2
+
+    async def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted at capacity."""
+        llm = make_llm(0)
+        cached = CachingLLM(llm, maxsize=1)
+
+        await cached.ainvoke(MESSAGES)
+        await cached.ainvoke([HumanMessage(content="other")])
+        await cached.ainvoke(MESSAGES)
+
+        assert llm.ainvoke.await_count == 3
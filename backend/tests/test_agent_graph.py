@@ -0,0 +1,262 @@
+"""
+Tests for the agent graph wiring and routing.
+"""
+
+import asyncio
+
+import aiosqlite
+import httpx
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+from app.agent import TaskStatus, TodoExecutorGraph
+from app.agent import graph as graph_module
+from app.agent.graph import should_continue
+
+
+class TestShouldContinue:
+    """Tests for the should_continue router."""
+
+    def test_routes_to_select_task_when_pending(self, sample_state):
+        """Test that pending tasks route back to select_task."""
+        sample_state["pending_count"] = 2
+
+        assert should_continue(sample_state) == "select_task"
+
+    def test_routes_to_complete_when_none_pending(self, sample_state):
+        """Test that an exhausted counter routes to complete."""
+        sample_state["pending_count"] = 0
+
+        assert should_continue(sample_state) == "complete"
+
+    def test_falls_back_to_scan_without_counter(self, sample_state):
+        """Test that states without a counter still route by task status."""
+        assert should_continue(sample_state) == "select_task"
+
+        for task in sample_state["tasks"]:
+            task["status"] = TaskStatus.COMPLETED.value
+
+        assert should_continue(sample_state) == "complete"
+
+
+class TestMaintenance:
+    """Tests for the WAL checkpoint task and aclose()."""
+
+    def test_construction_outside_event_loop(self, mock_llm):
+        """Test that a checkpointed graph can be built without a running loop."""
+        agent = TodoExecutorGraph(mock_llm, checkpointer=MagicMock())
+
+        assert agent._wal_task is None
+
+    async def test_wal_loop_runs_checkpoint(self, mock_llm, tmp_path, monkeypatch):
+        """Test that the maintenance task issues passive WAL checkpoints."""
+        monkeypatch.setattr(graph_module, "WAL_CHECKPOINT_INTERVAL", 0)
+        conn = await aiosqlite.connect(str(tmp_path / "checkpoints.db"))
+        executed = []
+        execute = conn.execute
+
+        def recording_execute(sql, *args):
+            executed.append(sql)
+            return execute(sql, *args)
+
+        conn.execute = recording_execute
+        agent = TodoExecutorGraph(mock_llm, checkpointer=AsyncSqliteSaver(conn))
+
+        async def checkpointed():
+            while "PRAGMA wal_checkpoint(PASSIVE)" not in executed:
+                await asyncio.sleep(0)
+
+        agent.start_maintenance()
+        try:
+            await asyncio.wait_for(checkpointed(), timeout=1.0)
+        finally:
+            await agent.aclose()
+
+    async def test_aclose_stops_task_and_closes_connections(self, mock_llm, tmp_path):
+        """Test that aclose() cancels maintenance and closes DB and HTTP clients."""
+        conn = await aiosqlite.connect(str(tmp_path / "checkpoints.db"))
+        http_client = AsyncMock()
+        agent = TodoExecutorGraph(
+            mock_llm,
+            checkpointer=AsyncSqliteSaver(conn),
+            http_client=http_client
+        )
+        agent.start_maintenance()
+        wal_task = agent._wal_task
+
+        await agent.aclose()
+
+        assert wal_task.cancelled()
+        assert agent._wal_task is None
+        http_client.aclose.assert_awaited_once()
+        with pytest.raises(ValueError):
+            await conn.execute("SELECT 1")
+
+
+async def put_checkpoint(saver: AsyncSqliteSaver, session_id: str, values: dict):
+    """Write a root checkpoint holding the given channel values."""
+    checkpoint = empty_checkpoint()
+    checkpoint["channel_values"] = values
+    config = {"configurable": {"thread_id": session_id, "checkpoint_ns": ""}}
+    await saver.aput(config, checkpoint, {}, {})
+
+
+class TestGetStateCache:
+    """Tests for the per-session get_state cache."""
+
+    @pytest.fixture
+    async def agent(self, mock_llm, tmp_path):
+        conn = await aiosqlite.connect(str(tmp_path / "checkpoints.db"))
+        saver = AsyncSqliteSaver(conn)
+        await saver.setup()
+        agent = TodoExecutorGraph(mock_llm, checkpointer=saver)
+        compiled = agent.compile()
+        aget_state = compiled.aget_state
+        agent.loads = 0
+
+        async def counting_aget_state(config):
+            agent.loads += 1
+            return await aget_state(config)
+
+        compiled.aget_state = counting_aget_state
+        yield agent
+        await conn.close()
+
+    async def test_unchanged_checkpoint_is_served_from_cache(self, agent):
+        """Test that a repeat read at the same checkpoint skips deserialization."""
+        await put_checkpoint(agent.checkpointer, "s1", {"goal": "Goal"})
+
+        first = await agent.get_state("s1")
+        second = await agent.get_state("s1")
+
+        assert second is first
+        assert first["goal"] == "Goal"
+        assert agent.loads == 1
+
+    async def test_new_checkpoint_invalidates_cache(self, agent):
+        """Test that a newer checkpoint is read instead of the cached state."""
+        await put_checkpoint(agent.checkpointer, "s1", {"goal": "Goal", "phase": "planning"})
+        await agent.get_state("s1")
+        await put_checkpoint(agent.checkpointer, "s1", {"goal": "Goal", "phase": "completed"})
+
+        state = await agent.get_state("s1")
+
+        assert state["phase"] == "completed"
+        assert agent.loads == 2
+
+    async def test_cache_evicts_least_recently_used(self, agent, monkeypatch):
+        """Test that the cache holds at most STATE_CACHE_SIZE sessions."""
+        monkeypatch.setattr(graph_module, "STATE_CACHE_SIZE", 2)
+        for session_id in ("a", "b", "c"):
+            await put_checkpoint(agent.checkpointer, session_id, {"goal": session_id})
+        await agent.get_state("a")
+        await agent.get_state("b")
+        await agent.get_state("a")
+        await agent.get_state("c")
+
+        assert list(agent._state_cache) == ["a", "c"]
+
+
+class TestListSessions:
+    """Tests for list_sessions against a real SQLite checkpointer."""
+
+    @pytest.fixture
+    async def saver(self, tmp_path):
+        conn = await aiosqlite.connect(str(tmp_path / "checkpoints.db"))
+        yield AsyncSqliteSaver(conn)
+        await conn.close()
+
+    async def test_fresh_database_lists_nothing(self, mock_llm, saver, caplog):
+        """Test that listing before any run sets up tables instead of failing."""
+        agent = TodoExecutorGraph(mock_llm, checkpointer=saver)
+
+        assert await agent.list_sessions() == []
+        assert not [r for r in caplog.records if r.levelname == "ERROR"]
+
+    async def test_latest_checkpoint_per_session_most_recent_first(
+        self, mock_llm, saver, sample_tasks
+    ):
+        """Test that each session is summarized from its latest checkpoint."""
+        agent = TodoExecutorGraph(mock_llm, checkpointer=saver)
+        await saver.setup()
+        await put_checkpoint(saver, "older", {"goal": "Old goal", "phase": "planning"})
+        await put_checkpoint(saver, "newer", {"goal": "New goal", "phase": "planning"})
+        await put_checkpoint(saver, "older", {
+            "goal": "Old goal",
+            "phase": "completed",
+            "tasks": sample_tasks,
+            "pending_count": 2,
+            "completed_count": 1
+        })
+
+        sessions = await agent.list_sessions()
+
+        assert [s["session_id"] for s in sessions] == ["older", "newer"]
+        assert sessions[0] == {
+            "session_id": "older",
+            "goal": "Old goal",
+            "phase": "completed",
+            "task_count": len(sample_tasks),
+            "completed_count": 1
+        }
+        assert sessions[1]["task_count"] == 0
+
+    async def test_limit_keeps_most_recent_sessions(self, mock_llm, saver, monkeypatch):
+        """Test that only the SESSION_LIST_LIMIT most recent sessions are loaded."""
+        monkeypatch.setattr(graph_module, "SESSION_LIST_LIMIT", 2)
+        agent = TodoExecutorGraph(mock_llm, checkpointer=saver)
+        await saver.setup()
+        for session_id in ("a", "b", "c"):
+            await put_checkpoint(saver, session_id, {"goal": session_id})
+
+        sessions = await agent.list_sessions()
+
+        assert [s["session_id"] for s in sessions] == ["c", "b"]
+
+
+class TestCreateAgent:
+    """Tests for the create_agent factory."""
+
+    async def test_failed_startup_closes_connections(self, tmp_path, monkeypatch):
+        """Test that a failing DB setup closes the connection and HTTP pool."""
+        clients, conns = [], []
+
+        class RecordingClient(httpx.AsyncClient):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                clients.append(self)
+
+        async def failing_configure(conn):
+            conns.append(conn)
+            raise RuntimeError("disk I/O error")
+
+        monkeypatch.setattr(graph_module.httpx, "AsyncClient", RecordingClient)
+        monkeypatch.setattr(graph_module, "_configure_connection", failing_configure)
+
+        with pytest.raises(RuntimeError):
+            await graph_module.create_agent(
+                openai_api_key="test-key",
+                db_path=str(tmp_path / "checkpoints.db")
+            )
+
+        assert clients[0].is_closed
+        with pytest.raises(ValueError):
+            await conns[0].execute("SELECT 1")
+
+
+class TestNodeEvents:
+    """Tests for node event delivery."""
+
+    async def test_events_call_on_event_directly(self, mock_llm):
+        """Test that node start/end events go straight to on_event."""
+        on_event = MagicMock()
+        graph = TodoExecutorGraph(llm=mock_llm, on_event=on_event)
+
+        async def select_task(state):
+            return {}
+
+        await graph._wrap_node(select_task)({})
+
+        assert [c.args[0] for c in on_event.call_args_list] == ["node_start", "node_end"]
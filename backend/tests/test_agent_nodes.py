@@ -4,8 +4,11 @@ Tests for agent node functions.
 
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
+from langgraph.graph import StateGraph, START, END
 from app.agent import TaskStatus
-from app.agent.nodes import AgentNodes
+from app.agent.cache import CachingLLM
+from app.agent.nodes import AgentNodes, _strip_code_fence
+from app.agent.state import AgentState, tasks_reducer
 
 
 class TestAgentNodes:
@@ -16,27 +19,32 @@ class TestAgentNodes:
         """Create AgentNodes instance with mocked LLM."""
         return AgentNodes(llm=mock_llm)
 
-    @pytest.mark.asyncio
-    async def test_analyze_goal_sets_phase(self, agent_nodes, sample_state):
-        """Test that analyze_goal sets the correct phase."""
-        result = await agent_nodes.analyze_goal(sample_state)
-
-        assert result["phase"] == "analyzing"
-        assert len(result["traces"]) > 0
+    async def test_analyze_and_plan_creates_trace(self, agent_nodes, sample_state, mock_llm):
+        """Test that analyze_and_plan records the analysis step first."""
+        mock_llm.ainvoke.return_value = MagicMock(
+            content='{"ack": "On it.", "tasks": [{"title": "Write", "description": "Write it"}], "reasoning": "r"}'
+        )
 
-    @pytest.mark.asyncio
-    async def test_analyze_goal_creates_trace(self, agent_nodes, sample_state):
-        """Test that analyze_goal creates a trace entry."""
-        result = await agent_nodes.analyze_goal(sample_state)
+        result = await agent_nodes.analyze_and_plan(sample_state)
 
         trace = result["traces"][0]
-        assert trace["node"] == "analyze_goal"
+        assert trace["node"] == "analyze_and_plan"
         assert trace["action"] == "analyzing"
         assert "timestamp" in trace
 
-    @pytest.mark.asyncio
-    async def test_plan_todos_creates_tasks(self, agent_nodes, sample_state, mock_llm):
-        """Test that plan_todos creates tasks from LLM response."""
+    async def test_analyze_and_plan_single_llm_call(self, agent_nodes, sample_state, mock_llm):
+        """Test that acknowledgement and plan come from one LLM call."""
+        mock_llm.ainvoke.return_value = MagicMock(
+            content='{"ack": "On it.", "tasks": [{"title": "Write", "description": "Write it"}], "reasoning": "r"}'
+        )
+
+        result = await agent_nodes.analyze_and_plan(sample_state)
+
+        mock_llm.ainvoke.assert_awaited_once()
+        assert result["messages"][0].content == "On it."
+
+    async def test_analyze_and_plan_creates_tasks(self, agent_nodes, sample_state, mock_llm):
+        """Test that analyze_and_plan creates tasks from LLM response."""
         mock_llm.ainvoke.return_value = MagicMock(
             content="""{
                 "tasks": [
@@ -48,14 +56,13 @@ class TestAgentNodes:
             }"""
         )
 
-        result = await agent_nodes.plan_todos(sample_state)
+        result = await agent_nodes.analyze_and_plan(sample_state)
 
         assert "tasks" in result
         assert len(result["tasks"]) > 0
         assert result["phase"] == "planning"
 
-    @pytest.mark.asyncio
-    async def test_plan_todos_task_structure(self, agent_nodes, sample_state, mock_llm):
+    async def test_analyze_and_plan_task_structure(self, agent_nodes, sample_state, mock_llm):
         """Test that created tasks have correct structure."""
         mock_llm.ainvoke.return_value = MagicMock(
             content="""{
@@ -67,17 +74,120 @@ class TestAgentNodes:
             }"""
         )
 
-        result = await agent_nodes.plan_todos(sample_state)
+        result = await agent_nodes.analyze_and_plan(sample_state)
 
         if "tasks" in result and result["tasks"]:
             task = result["tasks"][0]
-            assert "id" in task
-            assert "title" in task
-            assert "description" in task
-            assert "status" in task
+            expected = {"id", "title", "description", "status"}
+            assert task.keys() >= expected, f"missing keys: {expected - task.keys()}"
             assert task["status"] == TaskStatus.PENDING.value
 
-    @pytest.mark.asyncio
+    async def test_analyze_and_plan_strips_code_fence(self, agent_nodes, sample_state, mock_llm):
+        """Test that a plan wrapped in a markdown code fence is parsed."""
+        mock_llm.ainvoke.return_value = MagicMock(
+            content='```json\n{"tasks": [{"title": "A", "description": "B"}]}\n```'
+        )
+
+        result = await agent_nodes.analyze_and_plan(sample_state)
+
+        assert [t["title"] for t in result["tasks"]] == ["A"]
+
+    async def test_analyze_and_plan_invalid_json_sets_error(self, agent_nodes, sample_state, mock_llm):
+        """Test that an unparseable plan puts the agent in the error phase."""
+        mock_llm.ainvoke.return_value = MagicMock(content="Sure! Here are some tasks.")
+
+        result = await agent_nodes.analyze_and_plan(sample_state)
+
+        assert result["phase"] == "error"
+        assert result["traces"][-1]["action"] == "planning_error"
+
+    async def test_analyze_and_plan_sets_pending_count(self, agent_nodes, sample_state, mock_llm):
+        """Test that analyze_and_plan initializes the pending task counter."""
+        mock_llm.ainvoke.return_value = MagicMock(
+            content="""{
+                "tasks": [
+                    {"title": "Research the topic", "description": "Do research"},
+                    {"title": "Write content", "description": "Write it"}
+                ],
+                "reasoning": "Basic workflow"
+            }"""
+        )
+
+        result = await agent_nodes.analyze_and_plan(sample_state)
+
+        assert result["pending_count"] == 2
+
+    async def test_execute_task_timestamps_share_node_clock(self, agent_nodes, sample_state):
+        """Test that task timestamps and their traces use the same UTC reading."""
+        sample_state["current_task_index"] = 0
+
+        result = await agent_nodes.execute_task(sample_state)
+
+        task = result["tasks"][0]
+        trace_start, trace_complete = result["traces"]
+        assert trace_start["timestamp"] == task["started_at"]
+        assert trace_complete["timestamp"] == task["completed_at"]
+        assert task["started_at"].endswith("+00:00")
+
+    async def test_execute_task_returns_only_updated_task(self, agent_nodes, sample_state):
+        """Test that execute_task leaves merging the task list to the reducer."""
+        sample_state["current_task_index"] = 1
+
+        result = await agent_nodes.execute_task(sample_state)
+
+        assert [t["id"] for t in result["tasks"]] == ["task-2"]
+
+    async def test_execute_task_emits_counter_deltas(self, agent_nodes, sample_state, mock_llm):
+        """Test that execute_task reports one finished task via counter deltas."""
+        sample_state["current_task_index"] = 0
+        mock_llm.ainvoke.side_effect = Exception("boom")
+
+        result = await agent_nodes.execute_task(sample_state)
+
+        assert result["completed_count"] == 0
+        assert result["failed_count"] == 1
+
+    async def test_analyze_and_plan_uses_planning_llm(self, sample_state, mock_llm):
+        """Test that planning goes to the planning LLM when one is provided."""
+        planning_llm = AsyncMock()
+        planning_llm.ainvoke.return_value = MagicMock(
+            content='{"tasks": [{"title": "Only task", "description": "Do it"}], "reasoning": "r"}'
+        )
+        nodes = AgentNodes(llm=mock_llm, planning_llm=planning_llm)
+
+        result = await nodes.analyze_and_plan(sample_state)
+
+        assert len(result["tasks"]) == 1
+        planning_llm.ainvoke.assert_awaited_once()
+        mock_llm.ainvoke.assert_not_awaited()
+
+    async def test_analyze_and_plan_rejects_non_string_fields(self, agent_nodes, sample_state, mock_llm):
+        """Test that tasks with non-string titles or descriptions fail planning."""
+        mock_llm.ainvoke.return_value = MagicMock(
+            content='{"tasks": [{"title": ["Task"], "description": null}]}'
+        )
+
+        result = await agent_nodes.analyze_and_plan(sample_state)
+
+        assert result["phase"] == "error"
+        assert "tasks" not in result
+
+    async def test_unparseable_plan_is_not_cached(self, sample_state, mock_llm):
+        """Test that a plan that failed to parse is requested again on retry."""
+        mock_llm.temperature = 0
+        mock_llm.ainvoke.side_effect = [
+            MagicMock(content="not json"),
+            MagicMock(content='{"tasks": [{"title": "Only task", "description": "Do it"}]}')
+        ]
+        nodes = AgentNodes(llm=CachingLLM(mock_llm))
+
+        failed = await nodes.analyze_and_plan(sample_state)
+        retried = await nodes.analyze_and_plan(sample_state)
+
+        assert failed["phase"] == "error"
+        assert len(retried["tasks"]) == 1
+        assert mock_llm.ainvoke.await_count == 2
+
     async def test_select_task_picks_pending(self, agent_nodes, sample_state):
         """Test that select_task picks the first pending task."""
         result = await agent_nodes.select_task(sample_state)
@@ -86,7 +196,6 @@ class TestAgentNodes:
         assert result["current_task_index"] == 0
         assert result["phase"] == "executing"
 
-    @pytest.mark.asyncio
     async def test_select_task_skips_completed(self, agent_nodes, sample_state):
         """Test that select_task skips completed tasks."""
         # Mark first task as completed
@@ -96,7 +205,6 @@ class TestAgentNodes:
 
         assert result["current_task_index"] == 1
 
-    @pytest.mark.asyncio
     async def test_select_task_when_all_done(self, agent_nodes, sample_state):
         """Test select_task when all tasks are completed."""
         for task in sample_state["tasks"]:
@@ -107,7 +215,6 @@ class TestAgentNodes:
         assert result["current_task_index"] == -1
         assert result["phase"] == "completed"
 
-    @pytest.mark.asyncio
     async def test_execute_task_updates_status(self, agent_nodes, sample_state, mock_llm):
         """Test that execute_task updates task status."""
         sample_state["current_task_index"] = 0
@@ -125,7 +232,6 @@ class TestAgentNodes:
             TaskStatus.FAILED.value
         ]
 
-    @pytest.mark.asyncio
     async def test_execute_task_sets_result(self, agent_nodes, sample_state, mock_llm):
         """Test that execute_task sets the result on success."""
         sample_state["current_task_index"] = 0
@@ -141,7 +247,90 @@ class TestAgentNodes:
         if executed_task["status"] == TaskStatus.COMPLETED.value:
             assert executed_task["result"] is not None
 
-    @pytest.mark.asyncio
+    async def test_execute_task_decrements_pending_count(self, agent_nodes, sample_state):
+        """Test that execute_task decrements the pending task counter."""
+        sample_state["current_task_index"] = 0
+        sample_state["pending_count"] = 3
+
+        result = await agent_nodes.execute_task(sample_state)
+
+        assert result["pending_count"] == 2
+
+    async def test_execute_all_tasks_runs_every_pending_task(self, agent_nodes, sample_state, mock_llm):
+        """Test that execute_all_tasks completes all pending tasks in order."""
+        sample_state["tasks"][0]["status"] = TaskStatus.COMPLETED.value
+        mock_llm.ainvoke.return_value = MagicMock(content="Deliverable")
+
+        result = await agent_nodes.execute_all_tasks(sample_state)
+
+        assert [t["id"] for t in result["tasks"]] == ["task-1", "task-2", "task-3"]
+        assert all(t["status"] == TaskStatus.COMPLETED.value for t in result["tasks"])
+        assert mock_llm.ainvoke.await_count == 2
+        assert result["pending_count"] == 0
+
+    async def test_execute_all_tasks_isolates_failures(self, agent_nodes, sample_state, mock_llm):
+        """Test that one failing task doesn't fail the others."""
+        mock_llm.ainvoke.side_effect = [
+            MagicMock(content="ok"),
+            Exception("rate limited"),
+            MagicMock(content="ok"),
+        ]
+
+        result = await agent_nodes.execute_all_tasks(sample_state)
+
+        statuses = sorted(t["status"] for t in result["tasks"])
+        assert statuses.count(TaskStatus.COMPLETED.value) == 2
+        assert statuses.count(TaskStatus.FAILED.value) == 1
+        assert result["completed_count"] == 2
+        assert result["failed_count"] == 1
+
+    async def test_execute_all_tasks_batched_uses_one_call(self, agent_nodes, sample_state, mock_llm):
+        """Test that batched execution fills every task from a single response."""
+        mock_llm.ainvoke.return_value = MagicMock(content=(
+            '```json\n[{"id": "task-1", "result": "A"}, {"id": "task-2", "result": "B"},'
+            ' {"id": "task-3", "result": "C"}]\n```'
+        ))
+
+        result = await agent_nodes.execute_all_tasks_batched(sample_state)
+
+        mock_llm.ainvoke.assert_awaited_once()
+        assert [t["result"] for t in result["tasks"]] == ["A", "B", "C"]
+        assert result["completed_count"] == 3
+        assert result["pending_count"] == 0
+
+    async def test_execute_all_tasks_batched_runs_missing_tasks_individually(
+        self, agent_nodes, sample_state, mock_llm
+    ):
+        """Test that tasks absent from the batch response are executed one by one."""
+        mock_llm.ainvoke.side_effect = [
+            MagicMock(content='[{"id": "task-1", "result": "A"}]'),
+            MagicMock(content="B"),
+            MagicMock(content="C"),
+        ]
+
+        result = await agent_nodes.execute_all_tasks_batched(sample_state)
+
+        assert mock_llm.ainvoke.await_count == 3
+        assert sorted(t["result"] for t in result["tasks"]) == ["A", "B", "C"]
+        assert result["completed_count"] == 3
+
+    async def test_execute_all_tasks_batched_falls_back_on_bad_json(
+        self, agent_nodes, sample_state, mock_llm
+    ):
+        """Test that an unparseable batch response falls back to per-task calls."""
+        mock_llm.ainvoke.side_effect = [
+            MagicMock(content="Here are your deliverables!"),
+            MagicMock(content="A"),
+            MagicMock(content="B"),
+            MagicMock(content="C"),
+        ]
+
+        result = await agent_nodes.execute_all_tasks_batched(sample_state)
+
+        assert mock_llm.ainvoke.await_count == 4
+        assert result["traces"][1]["action"] == "batch_fallback"
+        assert all(t["status"] == TaskStatus.COMPLETED.value for t in result["tasks"])
+
     async def test_reflect_creates_summary(self, agent_nodes, sample_state, mock_llm):
         """Test that reflect creates a summary trace."""
         sample_state["tasks"][0]["status"] = TaskStatus.COMPLETED.value
@@ -156,7 +345,79 @@ class TestAgentNodes:
         reflection_trace = result["traces"][-1]
         assert reflection_trace["action"] == "reflection"
 
-    @pytest.mark.asyncio
+    async def test_reflect_templates_successful_task(self, agent_nodes, sample_state, mock_llm):
+        """Test that reflecting on a completed task doesn't call the LLM."""
+        sample_state["tasks"][0]["status"] = TaskStatus.COMPLETED.value
+        sample_state["current_task_index"] = 0
+
+        result = await agent_nodes.reflect(sample_state)
+
+        mock_llm.ainvoke.assert_not_awaited()
+        assert result["traces"][-1]["message"] == "Completed Research topic: 1/3 done"
+
+    async def test_reflect_templates_failed_task(self, agent_nodes, sample_state, mock_llm):
+        """Test that failed tasks are templated unless verbose reflection is on."""
+        sample_state["tasks"][0]["status"] = TaskStatus.FAILED.value
+        sample_state["current_task_index"] = 0
+
+        result = await agent_nodes.reflect(sample_state)
+
+        mock_llm.ainvoke.assert_not_awaited()
+        assert result["traces"][-1]["message"] == "Failed Research topic: 0/3 done, 1 failed"
+
+    async def test_reflect_reads_progress_counters(self, agent_nodes, sample_state):
+        """Test that reflect uses the running counters when present."""
+        sample_state["tasks"][0]["status"] = TaskStatus.COMPLETED.value
+        sample_state["current_task_index"] = 0
+        sample_state["pending_count"] = 0
+        sample_state["completed_count"] = 2
+        sample_state["failed_count"] = 1
+
+        result = await agent_nodes.reflect(sample_state)
+
+        details = result["traces"][-1]["details"]
+        assert (details["completed"], details["failed"]) == (2, 1)
+
+    async def test_reflect_verbose_uses_llm_for_failed_task(self, sample_state, mock_llm):
+        """Test that verbose reflection asks the LLM about failed tasks."""
+        agent_nodes = AgentNodes(llm=mock_llm, verbose_reflection=True)
+        sample_state["tasks"][0]["status"] = TaskStatus.FAILED.value
+        sample_state["tasks"][0]["error"] = "Timeout"
+        sample_state["current_task_index"] = 0
+
+        result = await agent_nodes.reflect(sample_state)
+
+        mock_llm.ainvoke.assert_awaited_once()
+        assert result["traces"][-1]["message"] == "Test response from mocked LLM"
+
+    async def test_reflect_verbose_falls_back_when_llm_fails(self, sample_state, mock_llm):
+        """Test that verbose reflection falls back to the template if the LLM fails."""
+        mock_llm.ainvoke.side_effect = RuntimeError("provider unavailable")
+        agent_nodes = AgentNodes(llm=mock_llm, verbose_reflection=True)
+        sample_state["tasks"][0]["status"] = TaskStatus.FAILED.value
+        sample_state["tasks"][0]["error"] = "Timeout"
+        sample_state["current_task_index"] = 0
+
+        result = await agent_nodes.reflect(sample_state)
+
+        title = sample_state["tasks"][0]["title"]
+        assert result["traces"][-1]["message"] == f"Failed {title}: 0/3 done, 1 failed"
+
+    async def test_complete_recounts_legacy_session_in_graph(self, agent_nodes, sample_state):
+        """Test that a session without counters is summarized from its task list."""
+        sample_state["tasks"][0]["status"] = TaskStatus.COMPLETED.value
+        sample_state["tasks"][1]["status"] = TaskStatus.COMPLETED.value
+        sample_state["tasks"][2]["status"] = TaskStatus.FAILED.value
+        workflow = StateGraph(AgentState)
+        workflow.add_node("complete", agent_nodes.complete)
+        workflow.add_edge(START, "complete")
+        workflow.add_edge("complete", END)
+
+        result = await workflow.compile().ainvoke(sample_state)
+
+        details = result["traces"][-1]["details"]
+        assert (details["completed"], details["failed"]) == (2, 1)
+
     async def test_complete_sets_completed_phase(self, agent_nodes, sample_state):
         """Test that complete sets the completed phase."""
         for task in sample_state["tasks"]:
@@ -189,3 +450,41 @@ class TestTaskStatus:
     def test_needs_followup_value(self):
         """Test needs_followup status value."""
         assert TaskStatus.NEEDS_FOLLOWUP.value == "needs_followup"
+
+
+class TestStripCodeFence:
+    """Tests for _strip_code_fence."""
+
+    def test_multiline_fence_with_language_tag(self):
+        """Test that a fenced block on its own lines is unwrapped."""
+        assert _strip_code_fence('```json\n{"tasks": []}\n```') == '{"tasks": []}'
+
+    def test_single_line_fence(self):
+        """Test that a fence with the body on the same line is unwrapped."""
+        assert _strip_code_fence('```json {"tasks": []}```') == '{"tasks": []}'
+
+    def test_unfenced_content_is_unchanged(self):
+        """Test that plain JSON passes through stripped of whitespace."""
+        assert _strip_code_fence('  {"tasks": []}\n') == '{"tasks": []}'
+
+
+class TestTasksReducer:
+    """Tests for the tasks_reducer merge."""
+
+    def test_updates_in_place_preserving_order(self, sample_tasks):
+        """Test that an updated task keeps its position in the list."""
+        updated = {**sample_tasks[1], "status": TaskStatus.COMPLETED.value}
+
+        result = tasks_reducer(sample_tasks, [updated])
+
+        assert [t["id"] for t in result] == ["task-1", "task-2", "task-3"]
+        assert result[1] is updated
+        assert sample_tasks[1]["status"] == TaskStatus.PENDING.value
+
+    def test_appends_unknown_tasks(self, sample_tasks):
+        """Test that tasks with new IDs are appended once."""
+        new_task = {**sample_tasks[0], "id": "task-4"}
+
+        result = tasks_reducer(sample_tasks, [new_task, new_task])
+
+        assert [t["id"] for t in result] == ["task-1", "task-2", "task-3", "task-4"]
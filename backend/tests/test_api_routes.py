@@ -2,123 +2,204 @@
 Tests for FastAPI API routes.
 """
 
+import asyncio
+import json
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, patch
+import orjson
 import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
 from httpx import AsyncClient
+from langgraph.checkpoint.base import empty_checkpoint
+import app.agent as agent_package
+from app.api import routes
+import app.main as main_module
+from app.main import app
+from app.api.schemas import StartExecutionRequest
+from app.api.routes import (
+    SessionChannel,
+    _close_channel,
+    _now_iso,
+    _ping_message,
+    _publish_update,
+    _session_json,
+    _stream_channel,
+)
+
+
+def jloads(response) -> object:
+    """Decode a JSON response body with orjson."""
+    return orjson.loads(response.content)
+
+
+async def collect(stream) -> list[bytes]:
+    """Drain an async generator of SSE frames."""
+    return [frame async for frame in stream]
+
+
+def parse_frame(frame: bytes) -> tuple[str, dict]:
+    """Split a wire SSE frame into its event name and decoded data."""
+    event_line, data_line = frame.decode().split("\r\n")[:2]
+    return event_line.removeprefix("event: "), json.loads(data_line.removeprefix("data: "))
+
+
+# Endpoints open SSE channels; keep each test's registry separate
+pytestmark = pytest.mark.usefixtures("isolated_channels")
 
 
 class TestHealthEndpoint:
     """Tests for the health check endpoint."""
 
-    @pytest.mark.asyncio
-    async def test_health_check_returns_healthy(self, async_client: AsyncClient):
-        """Test that health endpoint returns healthy status."""
-        response = await async_client.get("/api/health")
+    def test_health_check_returns_status_and_version(self, client: TestClient):
+        """Test that health endpoint returns healthy status and the version."""
+        response = client.get("/api/health")
 
         assert response.status_code == 200
-        data = response.json()
+        data = jloads(response)
         assert data["status"] == "healthy"
-        assert "version" in data
-
-    @pytest.mark.asyncio
-    async def test_health_check_returns_version(self, async_client: AsyncClient):
-        """Test that health endpoint includes version."""
-        response = await async_client.get("/api/health")
-
-        assert response.status_code == 200
-        data = response.json()
         assert data["version"] == "1.0.0"
 
 
 class TestExecuteEndpoint:
     """Tests for the execute endpoint."""
 
-    @pytest.mark.asyncio
-    async def test_execute_creates_session(self, async_client: AsyncClient):
-        """Test that execute endpoint creates a new session."""
-        response = await async_client.post(
-            "/api/execute",
-            json={"goal": "Test goal for execution"}
-        )
+    @pytest.mark.parametrize("custom_id", [None, "my-custom-session-id"])
+    async def test_execute_creates_session(self, async_client: AsyncClient, custom_id):
+        """Test that execute returns the session, goal and stream URL in one response."""
+        payload = {"goal": "Test goal for execution"}
+        if custom_id:
+            payload["session_id"] = custom_id
 
-        assert response.status_code == 200
-        data = response.json()
-        assert "session_id" in data
-        assert data["goal"] == "Test goal for execution"
-        assert "stream_url" in data
-
-    @pytest.mark.asyncio
-    async def test_execute_with_custom_session_id(self, async_client: AsyncClient):
-        """Test that execute endpoint accepts custom session ID."""
-        custom_id = "my-custom-session-id"
-        response = await async_client.post(
-            "/api/execute",
-            json={"goal": "Test goal with custom session", "session_id": custom_id}
-        )
+        response = await async_client.post("/api/execute", json=payload)
 
         assert response.status_code == 200
-        data = response.json()
-        assert data["session_id"] == custom_id
-
-    @pytest.mark.asyncio
-    async def test_execute_returns_stream_url(self, async_client: AsyncClient):
-        """Test that execute endpoint returns correct stream URL."""
-        response = await async_client.post(
-            "/api/execute",
-            json={"goal": "Test goal with stream URL"}
-        )
-
-        assert response.status_code == 200
-        data = response.json()
+        data = jloads(response)
         session_id = data["session_id"]
+        assert session_id
+        if custom_id:
+            assert session_id == custom_id
+        assert data["goal"] == "Test goal for execution"
         assert data["stream_url"] == f"/api/stream/{session_id}"
 
+    async def test_stream_url_matches_stream_route(self):
+        """Test that the returned stream URL resolves to the SSE route."""
+        request = StartExecutionRequest(goal="Test goal for execution", session_id="s-url")
+
+        response = await routes.start_execution(request, agent=None)
+
+        assert response.stream_url == app.url_path_for("stream_execution", session_id="s-url")
+
 
 class TestSessionsEndpoint:
     """Tests for the sessions list endpoint."""
 
-    @pytest.mark.asyncio
     async def test_list_sessions_returns_array(self, async_client: AsyncClient):
         """Test that sessions endpoint returns an array."""
         response = await async_client.get("/api/sessions")
 
         assert response.status_code == 200
-        data = response.json()
+        data = jloads(response)
         assert isinstance(data, list)
 
-    @pytest.mark.asyncio
-    async def test_list_sessions_structure(self, async_client: AsyncClient):
+    async def test_list_sessions_structure(self, async_client: AsyncClient, api_agent):
         """Test that sessions have correct structure."""
+        checkpoint = empty_checkpoint()
+        checkpoint["channel_values"] = {"goal": "Create a document", "phase": "completed"}
+        await api_agent.checkpointer.setup()
+        await api_agent.checkpointer.aput(
+            {"configurable": {"thread_id": "s-structure", "checkpoint_ns": ""}},
+            checkpoint, {}, {}
+        )
+
         response = await async_client.get("/api/sessions")
 
         assert response.status_code == 200
-        data = response.json()
-
-        if len(data) > 0:
-            session = data[0]
-            assert "session_id" in session
-            assert "goal" in session
-            assert "phase" in session
-            assert "task_count" in session
-            assert "completed_count" in session
+        session = next(s for s in jloads(response) if s["session_id"] == "s-structure")
+        expected = {"session_id", "goal", "phase", "task_count", "completed_count"}
+        assert session.keys() >= expected, f"missing keys: {expected - session.keys()}"
+        assert session["goal"] == "Create a document"
+
+
+class TestSessionsFromAgent:
+    """Tests for session endpoints backed by a stubbed agent."""
+
+    async def test_list_sessions_serializes_constructed_items(self, async_client: AsyncClient):
+        """Test that unvalidated list items still serialize with defaults filled in."""
+        agent = AsyncMock()
+        agent.list_sessions.return_value = [{
+            "session_id": "s-1",
+            "goal": "Create a document",
+            "phase": "completed",
+            "task_count": 3,
+            "completed_count": 2
+        }]
+        app.dependency_overrides[routes.get_agent] = lambda: agent
+        try:
+            response = await async_client.get("/api/sessions")
+        finally:
+            app.dependency_overrides.clear()
+
+        assert jloads(response) == [{
+            "session_id": "s-1",
+            "goal": "Create a document",
+            "phase": "completed",
+            "task_count": 3,
+            "completed_count": 2,
+            "created_at": None
+        }]
+
+    async def test_get_session_emits_full_task_shape(self, async_client: AsyncClient, sample_state):
+        """Test that nested tasks are validated and serialized with every field."""
+        agent = AsyncMock()
+        agent.get_state.return_value = sample_state
+        app.dependency_overrides[routes.get_agent] = lambda: agent
+        try:
+            response = await async_client.get("/api/session/test-session-123")
+        finally:
+            app.dependency_overrides.clear()
+
+        task = jloads(response)["tasks"][0]
+        assert task["started_at"] is None
+        assert task["completed_at"] is None
 
 
 class TestSessionDetailEndpoint:
     """Tests for the session detail endpoint."""
 
-    @pytest.mark.asyncio
     async def test_get_nonexistent_session_returns_404(self, async_client: AsyncClient):
         """Test that getting a non-existent session returns 404."""
         response = await async_client.get("/api/session/nonexistent-session-id")
 
         assert response.status_code == 404
 
-    @pytest.mark.asyncio
+    async def test_stream_nonexistent_session_returns_404(self, async_client: AsyncClient):
+        """Test that streaming a non-existent session returns 404."""
+        response = await async_client.get("/api/session/nonexistent-session-id/stream")
+
+        assert response.status_code == 404
+
+    async def test_stream_session_yields_ndjson_lines(self, async_client: AsyncClient, sample_state):
+        """Test that a session streams as a header line then one line per task."""
+        agent = AsyncMock()
+        agent.get_state.return_value = sample_state
+        app.dependency_overrides[routes.get_agent] = lambda: agent
+        try:
+            response = await async_client.get("/api/session/test-session-123/stream")
+        finally:
+            app.dependency_overrides.clear()
+
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert lines[0]["task_count"] == 3
+        assert [line["task"]["id"] for line in lines[1:]] == ["task-1", "task-2", "task-3"]
+
     async def test_pause_session_returns_status(self, async_client: AsyncClient):
         """Test that pause endpoint returns correct status."""
         response = await async_client.post("/api/session/test-session/pause")
 
         assert response.status_code == 200
-        data = response.json()
+        data = jloads(response)
         assert data["status"] == "paused"
         assert data["session_id"] == "test-session"
 
@@ -126,16 +207,241 @@ class TestSessionDetailEndpoint:
 class TestStreamEndpoint:
     """Tests for the SSE stream endpoint."""
 
-    @pytest.mark.asyncio
     async def test_stream_returns_event_source(self, async_client: AsyncClient):
-        """Test that stream endpoint returns event-stream content type."""
-        # Note: We can't fully test SSE with httpx, but we can check it starts
-        response = await async_client.get(
-            "/api/stream/test-session",
-            params={"goal": "Test goal"},
-            timeout=2.0
+        """Test that stream endpoint returns an event stream ending in complete."""
+        class FinishedAgent:
+            async def run(self, session_id, goal):
+                yield {"complete": {"phase": "completed"}}
+
+        app.dependency_overrides[routes.get_agent] = lambda: FinishedAgent()
+        try:
+            response = await async_client.get(
+                "/api/stream/test-session",
+                params={"goal": "Test goal"}
+            )
+        finally:
+            app.dependency_overrides.clear()
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [line.removeprefix("event: ") for line in response.text.splitlines()
+                  if line.startswith("event: ")]
+        assert events[0] == "connected"
+        assert events[-1] == "complete"
+
+    async def test_disconnect_cancels_run(self):
+        """Test that closing the stream cancels its background agent run."""
+        started = asyncio.Event()
+
+        class HangingAgent:
+            async def run(self, session_id, goal):
+                started.set()
+                await asyncio.Event().wait()
+                yield {}
+
+        response = await routes.stream_execution(
+            "s-disconnect", goal="Test goal", agent=HangingAgent()
         )
+        body = response.body_iterator
+        assert parse_frame(await body.__anext__())[0] == "connected"
+        assert parse_frame(await body.__anext__())[0] == "phase_change"
+        await started.wait()
+        (run,) = routes._run_tasks
+
+        await body.aclose()
+        await asyncio.wait([run])
+        await asyncio.sleep(0)  # let the done callback run
+
+        assert run.cancelled()
+        assert not routes._run_tasks
+
+
+class TestEventLoop:
+    """Tests for the test-suite event loop."""
+
+    async def test_runs_on_uvloop_when_installed(self):
+        """Test that async tests share the server's uvloop event loop."""
+        uvloop = pytest.importorskip("uvloop")
+
+        assert isinstance(asyncio.get_running_loop(), uvloop.Loop)
+
+
+class TestGetAgent:
+    """Tests for lazy agent initialization."""
+
+    async def test_concurrent_first_requests_create_one_agent(self, monkeypatch):
+        """Test that concurrent callers share a single create_agent call."""
+        async def slow_create(**kwargs):
+            await asyncio.sleep(0.01)
+            return object()
+
+        create = AsyncMock(side_effect=slow_create)
+        monkeypatch.setattr(routes, "_agent", None)
+        monkeypatch.setattr(agent_package, "create_agent", create)
+        monkeypatch.setattr(routes, "get_settings", lambda: routes.Settings(openai_api_key="sk-test"))
+
+        agents = await asyncio.gather(*(routes.get_agent() for _ in range(5)))
+
+        create.assert_awaited_once()
+        assert all(agent is agents[0] for agent in agents)
+
+    async def test_missing_api_key_is_reported_at_first_use(self, monkeypatch):
+        """Test that an unset OpenAI key fails agent creation, not import."""
+        monkeypatch.setattr(routes, "_agent", None)
+        monkeypatch.setattr(routes, "get_settings", lambda: routes.Settings(openai_api_key=""))
+
+        with pytest.raises(HTTPException) as exc_info:
+            await routes.get_agent()
+
+        assert exc_info.value.status_code == 503
+
+    async def test_close_agent_closes_and_forgets_agent(self, monkeypatch):
+        """Test that close_agent closes the shared agent once and clears it."""
+        agent = AsyncMock()
+        monkeypatch.setattr(routes, "_agent", agent)
+
+        await routes.close_agent()
+        await routes.close_agent()
+
+        agent.aclose.assert_awaited_once()
+        assert routes._agent is None
+
+    async def test_lifespan_runs_log_listener_and_closes_agent(self, monkeypatch):
+        """Test that the app lifespan owns the log listener and the agent."""
+        agent = AsyncMock()
+        monkeypatch.setattr(routes, "_agent", agent)
+
+        async with main_module.lifespan(app):
+            assert main_module._log_listener._thread is not None
+
+        assert main_module._log_listener._thread is None
+        agent.aclose.assert_awaited_once()
+
+
+class TestSessionChannel:
+    """Tests for the per-session SSE event channel."""
+
+    async def test_stream_drains_burst_and_stops_on_complete(self):
+        """Test that buffered events are emitted in order up to completion."""
+        channel = SessionChannel()
+        channel.put({"event": "phase_change", "data": {"phase": "planning"}})
+        channel.put({"event": "complete", "data": {"session_id": "s"}})
+        channel.put({"event": "trace", "data": {}})
+
+        frames = [parse_frame(frame) async for frame in _stream_channel(channel)]
+
+        assert [event for event, _ in frames] == ["phase_change", "complete"]
+        assert frames[0][1] == {"phase": "planning"}
+
+    async def test_consumer_wakes_on_put(self):
+        """Test that a waiting consumer is woken by a later put."""
+        channel = SessionChannel()
+        waiter = asyncio.create_task(channel.wait())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+
+        channel.put({"event": "ping", "data": {}})
+
+        await asyncio.wait_for(waiter, timeout=1.0)
+
+    async def test_close_ends_consumer_suspended_mid_stream(self):
+        """Test that another connection closing the channel ends a mid-stream consumer."""
+        channel = SessionChannel()
+        channel.put({"event": "trace", "data": {"i": 0}})
+        stream = _stream_channel(channel)
+        assert parse_frame(await stream.__anext__()) == ("trace", {"i": 0})
+
+        _close_channel("s-shared", channel)
+
+        with pytest.raises(StopAsyncIteration):
+            await asyncio.wait_for(stream.__anext__(), timeout=1.0)
+
+    async def test_close_wakes_parked_consumer(self):
+        """Test that closing the channel wakes a consumer waiting for events."""
+        channel = SessionChannel()
+        frames = asyncio.create_task(collect(_stream_channel(channel)))
+        await asyncio.sleep(0)
+        assert not frames.done()
+
+        _close_channel("s-shared", channel)
+
+        assert await asyncio.wait_for(frames, timeout=1.0) == []
+
+    async def test_stream_encodes_datetimes(self):
+        """Test that naive datetimes are serialized as UTC ISO strings."""
+        channel = SessionChannel()
+        channel.put({"event": "complete", "data": {"at": datetime(2024, 1, 2, 3, 4, 5)}})
+
+        frames = [parse_frame(frame) async for frame in _stream_channel(channel)]
+
+        assert frames[0][1] == {"at": "2024-01-02T03:04:05+00:00"}
+
+    async def test_slow_consumer_is_evicted(self):
+        """Test that a consumer stuck over the bound past the timeout is disconnected."""
+        channel = SessionChannel(maxsize=1, timeout=5.0)
+
+        with patch("app.api.routes.time.monotonic", side_effect=[100.0, 106.0]):
+            for i in range(3):
+                channel.put({"event": "trace", "data": {"i": i}})
+        channel.put({"event": "trace", "data": {"i": 3}})
+
+        frames = [parse_frame(frame) async for frame in _stream_channel(channel)]
+
+        assert channel.slow and channel.closed
+        assert [event for event, _ in frames] == ["error"]
+
+    async def test_backlog_within_timeout_is_kept(self):
+        """Test that a briefly lagging consumer still receives every event."""
+        channel = SessionChannel(maxsize=1, timeout=5.0)
+
+        with patch("app.api.routes.time.monotonic", side_effect=[100.0, 101.0]):
+            for i in range(3):
+                channel.put({"event": "trace", "data": {"i": i}})
+        channel.put({"event": "complete", "data": {}})
+
+        frames = [parse_frame(frame) async for frame in _stream_channel(channel)]
+
+        assert not channel.slow
+        assert [event for event, _ in frames] == ["trace", "trace", "trace", "complete"]
+
+    async def test_pre_encoded_payloads_pass_through(self):
+        """Test that payloads built with _session_json are valid JSON and framed as is."""
+        sid_json = b'"session_id":"s-1"'
+        channel = SessionChannel()
+        channel.put({"event": "node_end", "data": _session_json(sid_json, {"node": "reflect"})})
+        channel.put({"event": "complete", "data": _session_json(sid_json)})
+
+        frames = [parse_frame(frame) async for frame in _stream_channel(channel)]
+
+        assert frames[0][1] == {"node": "reflect", "session_id": "s-1"}
+        assert frames[1][1] == {"session_id": "s-1"}
+
+    def test_ping_message_is_json_ping_event(self):
+        """Test that framework keepalives arrive as parseable ping events."""
+        ping = _ping_message()
+
+        assert ping.event == "ping"
+        timestamp = datetime.fromisoformat(json.loads(ping.data)["timestamp"])
+        assert timestamp.utcoffset() == timedelta(0)
+
+    def test_now_iso_is_reused_within_a_second(self):
+        """Test that the timestamp string is formatted once per second."""
+        with patch("app.api.routes.time.time", side_effect=[1700000000.1, 1700000000.9, 1700000001.0]):
+            first, second, third = _now_iso(), _now_iso(), _now_iso()
+
+        assert first is second
+        assert first == "2023-11-14T22:13:20+00:00"
+        assert third == "2023-11-14T22:13:21+00:00"
+
+    def test_publish_update_buffers_node_events_in_order(self):
+        """Test that one graph update is buffered as an ordered burst."""
+        channel = SessionChannel()
+        update = {"execute_task": {
+            "tasks": [{"id": "task-1"}],
+            "traces": [{"action": "execution_started"}, {"action": "execution_success"}],
+        }}
+
+        _publish_update(channel, b'"session_id":"s-1"', update)
 
-        # SSE endpoints typically return 200 with text/event-stream
-        # The response might timeout which is expected for SSE
-        assert response.status_code == 200 or response.status_code == 504
+        assert [e["event"] for e in channel.events] == ["node_end", "tasks_update", "trace", "trace"]
+        assert json.loads(channel.events[3]["data"])["trace"]["action"] == "execution_success"
@@ -9,27 +9,79 @@ from app.api.schemas import (
     SessionResponse,
     SessionListItem,
     HealthResponse,
+    ExecutionStartedResponse,
     TaskResponse,
     TraceResponse,
 )
 
 
+_req_validate = StartExecutionRequest.model_validate
+
+# Shared, read-only building blocks for SessionResponse tests
+_SAMPLE_TASK = TaskResponse(
+    id="task-1",
+    title="Research",
+    description="Research topic",
+    status="pending"
+)
+_EMPTY_TASKS: list[TaskResponse] = []
+_EMPTY_TRACES: list[TraceResponse] = []
+
+# Validated once at import; tests that only read fields share these.
+# Use model_copy(update=...) rather than mutating them.
+_FIXTURES = {
+    "pending_task": TaskResponse(
+        id="task-1",
+        title="Research topic",
+        description="Research the main topic",
+        status="pending"
+    ),
+    "completed_task": TaskResponse(
+        id="task-1",
+        title="Research topic",
+        description="Research the main topic",
+        status="completed",
+        result="Completed research output"
+    ),
+    "failed_task": TaskResponse(
+        id="task-1",
+        title="Research topic",
+        description="Research the main topic",
+        status="failed",
+        error="Task execution failed"
+    ),
+    "trace_basic": TraceResponse(
+        timestamp="2024-01-01T10:00:00",
+        node="analyze_goal",
+        action="analyzing",
+        message="Analyzing goal..."
+    ),
+    "complete_list_item": SessionListItem(
+        session_id="session-123",
+        goal="Create a document",
+        phase="completed",
+        task_count=5,
+        completed_count=5
+    ),
+}
+
+
 class TestStartExecutionRequest:
     """Tests for StartExecutionRequest schema."""
 
     def test_valid_request_with_goal(self):
         """Test creating valid request with goal."""
-        request = StartExecutionRequest(goal="Create a landing page for the company")
+        request = _req_validate({"goal": "Create a landing page for the company"})
 
         assert request.goal == "Create a landing page for the company"
         assert request.session_id is None
 
     def test_valid_request_with_session_id(self):
         """Test creating valid request with custom session_id."""
-        request = StartExecutionRequest(
-            goal="Create a landing page for testing",
-            session_id="custom-session-123"
-        )
+        request = _req_validate({
+            "goal": "Create a landing page for testing",
+            "session_id": "custom-session-123"
+        })
 
         assert request.goal == "Create a landing page for testing"
         assert request.session_id == "custom-session-123"
@@ -37,12 +89,12 @@ class TestStartExecutionRequest:
     def test_goal_is_required(self):
         """Test that goal is required."""
         with pytest.raises(ValidationError):
-            StartExecutionRequest()
+            _req_validate({})
 
     def test_short_goal_is_invalid(self):
         """Test that short goal is invalid (min 10 chars)."""
         with pytest.raises(ValidationError):
-            StartExecutionRequest(goal="short")
+            _req_validate({"goal": "short"})
 
 
 class TestTaskResponse:
@@ -50,12 +102,7 @@ class TestTaskResponse:
 
     def test_valid_task(self):
         """Test creating valid task."""
-        task = TaskResponse(
-            id="task-1",
-            title="Research topic",
-            description="Research the main topic",
-            status="pending"
-        )
+        task = _FIXTURES["pending_task"]
 
         assert task.id == "task-1"
         assert task.title == "Research topic"
@@ -63,36 +110,19 @@ class TestTaskResponse:
 
     def test_task_with_result(self):
         """Test task with result."""
-        task = TaskResponse(
-            id="task-1",
-            title="Research topic",
-            description="Research the main topic",
-            status="completed",
-            result="Completed research output"
-        )
+        task = _FIXTURES["completed_task"]
 
         assert task.result == "Completed research output"
 
     def test_task_with_error(self):
         """Test task with error."""
-        task = TaskResponse(
-            id="task-1",
-            title="Research topic",
-            description="Research the main topic",
-            status="failed",
-            error="Task execution failed"
-        )
+        task = _FIXTURES["failed_task"]
 
         assert task.error == "Task execution failed"
 
     def test_task_optional_fields_default_none(self):
         """Test that optional fields default to None."""
-        task = TaskResponse(
-            id="task-1",
-            title="Research topic",
-            description="Research the main topic",
-            status="pending"
-        )
+        task = _FIXTURES["pending_task"]
 
         assert task.result is None
         assert task.error is None
@@ -105,12 +135,7 @@ class TestTraceResponse:
 
     def test_valid_trace(self):
         """Test creating valid trace."""
-        trace = TraceResponse(
-            timestamp="2024-01-01T10:00:00",
-            node="analyze_goal",
-            action="analyzing",
-            message="Analyzing goal..."
-        )
+        trace = _FIXTURES["trace_basic"]
 
         assert trace.node == "analyze_goal"
         assert trace.action == "analyzing"
@@ -150,8 +175,8 @@ class TestSessionResponse:
             session_id="session-123",
             goal="Create a document",
             phase="executing",
-            tasks=[],
-            traces=[],
+            tasks=_EMPTY_TASKS,
+            traces=_EMPTY_TRACES,
             is_paused=False
         )
 
@@ -161,18 +186,12 @@ class TestSessionResponse:
 
     def test_session_with_tasks(self):
         """Test session response with tasks."""
-        task = TaskResponse(
-            id="task-1",
-            title="Research",
-            description="Research topic",
-            status="pending"
-        )
         response = SessionResponse(
             session_id="session-123",
             goal="Create a document",
             phase="executing",
-            tasks=[task],
-            traces=[],
+            tasks=[_SAMPLE_TASK],
+            traces=_EMPTY_TRACES,
             is_paused=False
         )
 
@@ -185,8 +204,8 @@ class TestSessionResponse:
             session_id="session-123",
             goal="Create a document",
             phase="error",
-            tasks=[],
-            traces=[],
+            tasks=_EMPTY_TASKS,
+            traces=_EMPTY_TRACES,
             is_paused=False,
             error="Something went wrong"
         )
@@ -199,13 +218,7 @@ class TestSessionListItem:
 
     def test_valid_list_item(self):
         """Test creating valid session list item."""
-        item = SessionListItem(
-            session_id="session-123",
-            goal="Create a document",
-            phase="completed",
-            task_count=5,
-            completed_count=5
-        )
+        item = _FIXTURES["complete_list_item"]
 
         assert item.session_id == "session-123"
         assert item.task_count == 5
@@ -213,27 +226,34 @@ class TestSessionListItem:
 
     def test_list_item_partial_completion(self):
         """Test session list item with partial completion."""
-        item = SessionListItem(
-            session_id="session-123",
-            goal="Create a document",
-            phase="executing",
-            task_count=5,
-            completed_count=3
+        item = _FIXTURES["complete_list_item"].model_copy(
+            update={"phase": "executing", "completed_count": 3}
         )
 
         assert item.completed_count < item.task_count
 
     def test_list_item_optional_created_at(self):
         """Test that created_at is optional."""
-        item = SessionListItem(
+        item = _FIXTURES["complete_list_item"]
+
+        assert item.created_at is None
+
+
+class TestExecutionStartedResponse:
+    """Tests for ExecutionStartedResponse schema."""
+
+    def test_serializes_to_json(self):
+        """Test that the response serializes with all fields."""
+        response = ExecutionStartedResponse(
             session_id="session-123",
             goal="Create a document",
-            phase="completed",
-            task_count=5,
-            completed_count=5
+            stream_url="/api/stream/session-123"
         )
 
-        assert item.created_at is None
+        assert response.model_dump_json() == (
+            '{"session_id":"session-123","goal":"Create a document",'
+            '"stream_url":"/api/stream/session-123"}'
+        )
 
 
 class TestHealthResponse:
@@ -228,6 +228,25 @@ describe('ExecutorStore', () => {
       expect(result.current.tasks).toEqual(tasks);
     });
 
+    it('should merge partial tasks_update by id', () => {
+      const { result } = renderHook(() => useExecutorStore());
+      const tasks = [
+        { id: '1', title: 'Task 1', status: 'completed' },
+        { id: '2', title: 'Task 2', status: 'pending' },
+        { id: '3', title: 'Task 3', status: 'pending' },
+      ];
+      const updated = { id: '2', title: 'Task 2', status: 'in_progress' };
+
+      act(() => {
+        result.current.setTasks(tasks);
+        result.current.handleSSEEvent('tasks_update', { tasks: [updated] });
+      });
+
+      expect(result.current.tasks).toEqual([tasks[0], updated, tasks[2]]);
+      expect(result.current.tasks[0]).toBe(tasks[0]);
+      expect(result.current.tasks[2]).toBe(tasks[2]);
+    });
+
     it('should handle complete event', () => {
       const { result } = renderHook(() => useExecutorStore());
 
@@ -19,11 +19,14 @@ function getNodeColor(node: string): string {
   switch (node) {
     case "analyze_goal":
       return "text-purple-500";
+    case "analyze_and_plan":
     case "plan_todos":
       return "text-blue-500";
     case "select_task":
       return "text-yellow-500";
     case "execute_task":
+    case "execute_all_tasks":
+    case "execute_all_tasks_batched":
       return "text-amber-500";
     case "reflect":
       return "text-cyan-500";
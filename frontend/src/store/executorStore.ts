@@ -132,9 +132,26 @@ export const useExecutorStore = create<ExecutorState>((set, get) => ({
         set({ phase: data.phase as ExecutionPhase });
         break;
 
-      case "tasks_update":
-        set({ tasks: data.tasks as Task[] });
+      case "tasks_update": {
+        // Updates carry only the changed tasks; merge them by id like the
+        // backend's tasks_reducer so existing tasks keep their position
+        const updates = data.tasks as Task[];
+        set((state) => {
+          const tasks = [...state.tasks];
+          const indexById = new Map(tasks.map((t, i) => [t.id, i]));
+          for (const task of updates) {
+            const index = indexById.get(task.id);
+            if (index === undefined) {
+              indexById.set(task.id, tasks.length);
+              tasks.push(task);
+            } else {
+              tasks[index] = task;
+            }
+          }
+          return { tasks };
+        });
         break;
+      }
 
       case "trace":
         const trace = data.trace as TraceEntry;